@@ -0,0 +1,4 @@
+"""
+benchmarks
+hot path benchmarks run against a local stand-in of the Disney and themeparks apis, see run.py
+"""
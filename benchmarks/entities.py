@@ -0,0 +1,70 @@
+"""
+entities module
+python -m benchmarks.entities [--count N] [--repeat N]
+
+Constructs a catalog of attractions from documents already in the response cache, so only the parsing in the constructors
+is measured, and reports the CPU time per constructor and the memory each instance adds on top of its document.
+"""
+import sys
+import math
+import time
+import argparse
+import tracemalloc
+from mousetools import Attraction
+from mousetools.client import DISNEY_API
+from mousetools.cache import response_cache
+from .stub import Catalog
+
+
+def fill_cache(count):
+    """Puts count attraction documents in the response cache and returns their ids"""
+    catalog = Catalog(attractions_per_park=math.ceil(count / 8), entertainments_per_park=0, characters=0)
+    ids = list(catalog.attractions)[:count]
+    response_cache.maxsize = max(response_cache.maxsize, count)
+    for id in ids:
+        response_cache.set("{}/global-pool-override-B/facility-service/attractions/{}".format(DISNEY_API, id), catalog.facility("attractions", id))
+    return ids
+
+def construct(ids, lazy = False):
+    """Constructs every id, forgetting the live instances first so each one is really built"""
+    Attraction.forget()
+    return [Attraction(id, lazy=lazy) for id in ids]
+
+def cpu_time(ids, repeat, lazy = False):
+    """Returns the lowest CPU seconds taken to construct every id over repeat runs"""
+    best = None
+    for i in range(repeat):
+        start = time.process_time()
+        construct(ids, lazy)
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def memory(ids, lazy = False):
+    """Returns (bytes allocated per instance, the instances)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = construct(ids, lazy)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / len(ids), entities
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Constructor CPU time and per instance memory of a catalog of attractions")
+    parser.add_argument("--count", type=int, default=10000, help="attractions in the catalog")
+    parser.add_argument("--repeat", type=int, default=5, help="runs to take the best CPU time of")
+    args = parser.parse_args(argv)
+
+    ids = fill_cache(args.count)
+    construct(ids)
+
+    print("{:<10}{:>10}{:>14}{:>16}{:>18}".format("mode", "count", "total ms", "us / instance", "bytes / instance"))
+    for lazy in (False, True):
+        seconds = cpu_time(ids, args.repeat, lazy)
+        per_instance, entities = memory(ids, lazy)
+        print("{:<10}{:>10}{:>14.1f}{:>16.2f}{:>18.0f}".format("lazy" if lazy else "eager", len(ids), seconds * 1000, seconds / len(ids) * 1e6, per_instance))
+    print("instance size without referenced objects: {} bytes, __dict__: {}".format(sys.getsizeof(entities[0]), hasattr(entities[0], "__dict__")))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
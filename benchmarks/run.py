@@ -0,0 +1,143 @@
+"""
+run module
+python -m benchmarks.run [--iterations N] [--threads N] [--latency MS] [--mode cold|warm|both] [--only NAME ...] [--json]
+
+Each benchmark runs its operation the given number of times against a local StubServer and reports throughput and
+p50/p90/p99 latency. In cold mode the response cache is off and wait times are downloaded on every call, so every
+operation goes over HTTP. In warm mode caches are left on, which is what most programs see after the first call.
+"""
+import sys
+import json
+import math
+import time
+import argparse
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from mousetools import Attraction, Park, Destination, Character, ids
+from mousetools import waittimes, schedules, store
+from mousetools.cache import response_cache
+from .stub import StubServer
+
+DATE = "2024-05-01"
+
+
+def attraction_construction(catalog):
+    attraction_ids = itertools.cycle(list(catalog.attractions)[:20])
+    return lambda: Attraction(next(attraction_ids))
+
+def park_wait_times_detailed(catalog):
+    parks = itertools.cycle([Park(id) for id in ids.WDW_PARK_IDS if id in ids.themeparkapi_ids])
+    return lambda: next(parks).get_wait_times_detailed()
+
+def destination_wait_times(catalog):
+    destination = Destination(ids.WDW_ID)
+    return lambda: destination.get_wait_times()
+
+def park_hours(catalog):
+    parks = itertools.cycle([Park(id) for id in ids.WDW_PARK_IDS])
+    return lambda: next(parks).get_hours(DATE)
+
+def character_related_locations(catalog):
+    characters = itertools.cycle([Character(id) for id in list(catalog.characters)[:10]])
+    return lambda: next(characters).get_related_locations()
+
+# name: function that does the setup and returns the operation to time
+BENCHMARKS = {
+    "attraction_construction": attraction_construction,
+    "park_wait_times_detailed": park_wait_times_detailed,
+    "destination_wait_times": destination_wait_times,
+    "park_hours": park_hours,
+    "character_related_locations": character_related_locations,
+}
+
+
+def percentile(times, p):
+    """Returns the nearest rank p-th percentile of an already sorted list"""
+    return times[max(0, math.ceil(p / 100 * len(times)) - 1)]
+
+def set_mode(mode):
+    """Turns caching off for "cold" and back on for "warm" """
+    response_cache.clear()
+    waittimes.clear()
+    schedules.clear()
+    response_cache.enabled = mode == "warm"
+    schedules.schedule_cache.enabled = mode == "warm"
+    waittimes.default_max_age = 60 if mode == "warm" else 0
+
+def measure(operation, iterations, threads, warmup = 5):
+    """Runs operation iterations times on threads threads and returns (seconds taken, sorted list of seconds per call)"""
+    def timed(i):
+        start = time.perf_counter()
+        operation()
+        return time.perf_counter() - start
+
+    for i in range(warmup):
+        operation()
+
+    start = time.perf_counter()
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            times = list(executor.map(timed, range(iterations)))
+    else:
+        times = [timed(i) for i in range(iterations)]
+    elapsed = time.perf_counter() - start
+
+    return elapsed, sorted(times)
+
+def run(names, modes, iterations, threads, latency):
+    """Runs the named benchmarks in each mode and returns a list of result dictionaries"""
+    server = StubServer(latency=latency).start()
+    previous = store.get_active()
+    store.disable()
+    results = []
+    try:
+        with server.transport():
+            for mode in modes:
+                for name in names:
+                    set_mode(mode)
+                    operation = BENCHMARKS[name](server.catalog)
+                    requests_before = sum(server.counts.values())
+                    elapsed, times = measure(operation, iterations, threads)
+                    results.append({
+                        'benchmark': name,
+                        'mode': mode,
+                        'threads': threads,
+                        'iterations': iterations,
+                        'ops_per_sec': iterations / elapsed,
+                        'p50_ms': percentile(times, 50) * 1000,
+                        'p90_ms': percentile(times, 90) * 1000,
+                        'p99_ms': percentile(times, 99) * 1000,
+                        'requests': sum(server.counts.values()) - requests_before,
+                    })
+    finally:
+        set_mode("warm")
+        server.stop()
+        if previous is not None:
+            store.enable(previous.path)
+
+    return results
+
+def format_results(results):
+    """Returns the results as a text table"""
+    lines = ["{:<30}{:>6}{:>9}{:>12}{:>10}{:>10}{:>10}{:>10}".format("benchmark", "mode", "threads", "ops/s", "p50 ms", "p90 ms", "p99 ms", "requests")]
+    for r in results:
+        lines.append("{:<30}{:>6}{:>9}{:>12.1f}{:>10.2f}{:>10.2f}{:>10.2f}{:>10}".format(r['benchmark'], r['mode'], r['threads'], r['ops_per_sec'], r['p50_ms'], r['p90_ms'], r['p99_ms'], r['requests']))
+    return "\n".join(lines)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="MouseTools hot path benchmarks against a local stand-in of the Disney and themeparks apis")
+    parser.add_argument("--iterations", type=int, default=200, help="calls timed per benchmark")
+    parser.add_argument("--threads", type=int, default=1, help="threads making the calls")
+    parser.add_argument("--latency", type=float, default=0, help="milliseconds the stub waits before every response")
+    parser.add_argument("--mode", choices=("cold", "warm", "both"), default="both")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run, default all")
+    parser.add_argument("--json", action="store_true", help="print the results as json")
+    args = parser.parse_args(argv)
+
+    modes = ("cold", "warm") if args.mode == "both" else (args.mode,)
+    results = run(args.only or list(BENCHMARKS), modes, args.iterations, args.threads, args.latency / 1000)
+    print(json.dumps(results, indent=2) if args.json else format_results(results))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
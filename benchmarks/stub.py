@@ -0,0 +1,302 @@
+"""
+stub module
+local stand-in for api.wdpro.disney.go.com, disneyworld.disney.go.com and api.themeparks.wiki
+"""
+import re
+import json
+import time
+import random
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from mousetools import ids
+from mousetools.client import DISNEY_API, DISNEY_AUTH, THEMEPARKS_API
+from mousetools.transport import Transport
+from mousetools.client import get_session
+
+LOREM = ("Set sail on a swashbuckling voyage to an era when pirates ruled the seas. Drift past a haunted grotto and into a "
+         "cursed pirate stronghold where cannons boom and townsfolk scramble. ")
+
+
+class Catalog(object):
+
+    def __init__(self, attractions_per_park = 40, entertainments_per_park = 30, characters = 80, seed = 0):
+        """
+        Constructor Function
+        Generates a fake but realistically sized destination catalog.
+        Every facility document is a few kilobytes of descriptions, media and facets like the real ones.
+        """
+        self.__random = random.Random(seed)
+        self.parks = {}
+        self.attractions = {}
+        self.entertainments = {}
+        self.characters = {}
+        self.venues = {ids.WDW_ID: ["80008033", "80008259"], ids.DLR_ID: ["80008294"]}
+
+        next_id = 18000000
+        for dest, park_ids in ((ids.WDW_ID, ids.WDW_PARK_IDS), (ids.DLR_ID, ids.DLR_PARK_IDS)):
+            for park_id in park_ids:
+                kind = "water-park" if park_id in (ids.TL_ID, ids.BB_ID) else "theme-park"
+                self.parks[park_id] = (dest, kind)
+                for i in range(attractions_per_park):
+                    next_id += 1
+                    self.attractions[str(next_id)] = (dest, park_id)
+                for i in range(entertainments_per_park):
+                    next_id += 1
+                    self.entertainments[str(next_id)] = (dest, park_id)
+
+        attraction_ids = list(self.attractions)
+        entertainment_ids = list(self.entertainments)
+        for i in range(characters):
+            next_id += 1
+            self.characters[str(next_id)] = (self.__random.sample(attraction_ids, 3), self.__random.sample(entertainment_ids, 4))
+
+    def facility(self, kind, id):
+        """Returns the facility document for a kind (e.g. "attractions") and id, None if there isn't one"""
+        if kind in ("attractions", "entertainments"):
+            entities = self.attractions if kind == "attractions" else self.entertainments
+            if id not in entities:
+                return None
+            dest, park_id = entities[id]
+            data = self.__document(id, kind[:-1].capitalize(), dest, park_id)
+            if kind == "entertainments":
+                data['duration'] = "00:25:00"
+                data['startDate'] = ""
+                data['endDate'] = ""
+                data['relatedLocations'] = {'primaryLocations': []}
+            return data
+
+        if kind in ("theme-parks", "water-parks"):
+            if id not in self.parks or self.parks[id][1] != kind[:-1]:
+                return None
+            dest, park_kind = self.parks[id]
+            data = self.__document(id, park_kind, dest, id)
+            data['advisories'] = [{'id': str(i), 'links': {'self': {'href': "{}/facility-service/advisories/{}".format(DISNEY_API, i)}}} for i in range(3)]
+            return data
+
+        if kind == "entertainment-venues":
+            for dest, venues in self.venues.items():
+                if id in venues:
+                    data = self.__document(id, "entertainment-venue", dest, None)
+                    data['advisories'] = [{'id': "1", 'links': {'self': {'href': "{}/facility-service/advisories/1".format(DISNEY_API)}}}]
+                    return data
+            return None
+
+        if kind == "characters":
+            if id not in self.characters:
+                return None
+            locations, events = self.characters[id]
+            data = self.__document(id, "character", ids.WDW_ID, None)
+            data['relatedLocations'] = {'primaryLocations': [{'facilityType': 'Attraction', 'links': {'self': {'href': "{}/facility-service/attractions/{}".format(DISNEY_API, i)}}} for i in locations]}
+            data['associatedEvents'] = [{'links': {'self': {'href': "{}/facility-service/entertainments/{}".format(DISNEY_API, i)}}} for i in events]
+            return data
+
+        if kind == "advisories":
+            return {'id': id, 'name': "Advisory {}".format(id), 'type': "advisory", 'links': {}}
+
+        if kind == "destinations":
+            if id not in (ids.WDW_ID, ids.DLR_ID):
+                return None
+            links = {name: {'href': "{}/facility-service/destinations/{}/{}".format(DISNEY_API, id, name)} for name in ("attractions", "entertainments", "entertainmentVenues", "themeParks", "waterParks")}
+            return {'id': id, 'name': "Walt Disney World Resort" if id == ids.WDW_ID else "Disneyland Resort", 'type': "destination", 'links': links}
+
+        return None
+
+    def listing(self, dest, name):
+        """Returns a destination's list of entities for a link name such as "attractions" """
+        if name == "attractions":
+            entries = [id for id, (d, p) in self.attractions.items() if d == dest]
+        elif name == "entertainments":
+            entries = [id for id, (d, p) in self.entertainments.items() if d == dest]
+        elif name == "entertainmentVenues":
+            entries = self.venues.get(dest, [])
+        elif name in ("themeParks", "waterParks"):
+            kind = "theme-park" if name == "themeParks" else "water-park"
+            entries = [id for id, (d, k) in self.parks.items() if d == dest and k == kind]
+        else:
+            return None
+        return {'entries': [{'id': id, 'links': {'self': {'href': "{}/facility-service/{}/{}?region=us".format(DISNEY_API, name, id)}}} for id in entries]}
+
+    def characters_listing(self):
+        return {'entries': [{'id': id, 'links': {'self': {'href': "{}/facility-service/characters/{}".format(DISNEY_API, id)}}} for id in self.characters]}
+
+    def associated_characters(self, id):
+        chars = [c for c, (locations, events) in self.characters.items() if id in locations or id in events]
+        return {'total': len(chars), 'entries': [{'links': {'self': {'href': "{}/facility-service/characters/{}".format(DISNEY_API, c)}}} for c in chars]}
+
+    def schedule(self, id, date):
+        schedules = [{'type': "Operating", 'date': date, 'startTime': "09:00:00", 'endTime': "22:00:00", 'timeZone': "America/New_York"},
+                     {'type': "Special Ticketed Event", 'date': date, 'startTime': "22:00:00", 'endTime': "01:00:00", 'timeZone': "America/New_York"}]
+        if id in self.entertainments:
+            for hour in (11, 13, 15, 17, 19):
+                schedules.append({'type': "Performance Time", 'date': date, 'startTime': "{}:00:00".format(hour), 'endTime': "{}:25:00".format(hour), 'timeZone': "America/New_York"})
+        return {'id': id, 'schedules': schedules}
+
+    def waittime(self, park):
+        """Returns the themeparks api feed for a park name, e.g. "WaltDisneyWorldMagicKingdom" """
+        park_ids = [id for id, name in ids.themeparkapi_ids.items() if name == park]
+        if len(park_ids) == 0:
+            return None
+
+        minute = int(time.time() // 60)
+        feed = []
+        for entities, meta in ((self.attractions, {'type': "ATTRACTION"}), (self.entertainments, {})):
+            for id, (dest, park_id) in entities.items():
+                if park_id == park_ids[0]:
+                    feed.append({'id': "{}_{}".format(park, id), 'name': "Entity {}".format(id), 'active': True, 'waitTime': (int(id) + minute) % 90,
+                                 'status': "Operating", 'fastPass': int(id) % 3 == 0, 'lastUpdate': "2024-05-01T15:{:02d}:00.000Z".format(minute % 60),
+                                 'meta': dict(meta, longitude=-81.58, latitude=28.41) if meta else {}})
+        for i in range(15):
+            feed.append({'id': "{}_9{}".format(park, i), 'name': "Restaurant {}".format(i), 'active': True, 'waitTime': None, 'status': "Operating",
+                         'fastPass': False, 'lastUpdate': "2024-05-01T15:00:00.000Z", 'meta': {'type': "RESTAURANT"}})
+        return feed
+
+    def __document(self, id, type, dest, park_id):
+        rand = random.Random(int(id))
+        data = {
+            'id': "{};entityType={}".format(id, type),
+            'name': "{} {}".format(type.replace('-', ' ').title(), id),
+            'type': type,
+            'subType': "Standard",
+            'webLink': "https://disneyworld.disney.go.com/{}/{}/".format(type, id),
+            'admissionRequired': True,
+            'ancestorDestination': {'id': "{};entityType=destination".format(dest)},
+            'links': {'self': {'href': "{}/facility-service/{}s/{}".format(DISNEY_API, type, id)}},
+            'descriptions': {'shortDescription': {'sections': {'body': LOREM[:120]}}, 'mobileDescription': {'text': LOREM * 3}},
+            'media': {"finderStandardThumb{}".format(i): {'url': "https://cdn1.parksmedia.wdprapps.disney.com/media/{}/{}.jpg".format(id, i), 'type': "image", 'transcodeTemplate': "Standard"} for i in range(8)},
+            'facets': [{'id': "facet{}".format(i), 'name': "Facet {}".format(i), 'urlFriendlyId': "facet-{}".format(i), 'group': "thrillLevel"} for i in range(rand.randint(8, 16))],
+            'classifications': [{'id': "classifications/{}".format(i), 'text': "Classification {}".format(i)} for i in range(4)],
+            'coordinates': {'Guest Entrance': {'gps': {'latitude': "{:.6f}".format(28.35 + rand.random() * 0.1), 'longitude': "{:.6f}".format(-81.60 + rand.random() * 0.1)}}},
+            'advisories': [],
+        }
+        if park_id is not None:
+            data['links']['ancestorThemePark'] = {'href': "{}/facility-service/theme-parks/{}".format(DISNEY_API, park_id)}
+            data['links']['ancestorLand'] = {'href': "{}/facility-service/lands/{}?region=us".format(DISNEY_API, 10000 + int(park_id) % 1000)}
+            data['ancestorThemeParkId'] = "{};entityType=theme-park".format(park_id)
+        return data
+
+
+class StubServer(object):
+
+    def __init__(self, catalog = None, latency = 0, port = 0):
+        """
+        Constructor Function
+        Serves catalog over HTTP on localhost. latency = seconds every response is delayed to simulate the network.
+        Responses are rendered once and then served from memory, so the stub itself doesn't dominate the benchmarks.
+        """
+        self.catalog = catalog if catalog is not None else Catalog()
+        self.latency = latency
+        self.counts = {}
+        self.__rendered = {}
+        self.__lock = threading.Lock()
+        self.__server = ThreadingHTTPServer(("127.0.0.1", port), self.__handler())
+        self.__server.daemon_threads = True
+        self.url = "http://127.0.0.1:{}".format(self.__server.server_address[1])
+
+    def start(self):
+        """Starts serving on a background thread and returns self"""
+        threading.Thread(target=self.__server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        """Stops serving"""
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def transport(self):
+        """Returns a transport that sends the library's requests to this server instead of the real hosts"""
+        return StubTransport(self.url)
+
+    def count(self, path):
+        """Counts a request in counts, keyed by its path with the ids replaced by {id}"""
+        endpoint = re.sub(r"\d+", "{id}", path)
+        with self.__lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+
+    def render(self, path, query):
+        """Returns (status, body) for a request path and query string"""
+        key = path + "?" + query
+        with self.__lock:
+            if key in self.__rendered:
+                return self.__rendered[key]
+
+        data = self.__route(path, parse_qs(query))
+        if data is None:
+            rendered = (404, json.dumps({'errors': [{'typeId': "404", 'message': "Not Found"}]}).encode("utf-8"))
+        else:
+            rendered = (200, json.dumps(data).encode("utf-8"))
+
+        # wait times change every minute and are small, everything else is rendered once
+        if not path.endswith("/waittime"):
+            with self.__lock:
+                self.__rendered[key] = rendered
+        return rendered
+
+    def __route(self, path, query):
+        catalog = self.catalog
+        if path == "/authentication/get-client-token":
+            return {'access_token': "stub-token", 'expires_in': 3600}
+
+        match = re.match(r"^/preview/parks/(\w+)/waittime$", path)
+        if match:
+            return catalog.waittime(match.group(1))
+
+        path = re.sub(r"^/global-pool-override-\w+", "", path)
+        match = re.match(r"^/facility-service/destinations/(\d+)/(\w+)$", path)
+        if match:
+            return catalog.listing(*match.groups())
+        match = re.match(r"^/facility-service/schedules/(\d+)$", path)
+        if match:
+            return catalog.schedule(match.group(1), query.get('date', ["2024-05-01"])[0])
+        match = re.match(r"^/facility-service/associated-characters/(\d+);entityType=\w+$", path)
+        if match:
+            return catalog.associated_characters(match.group(1))
+        if path == "/facility-service/characters":
+            return catalog.characters_listing()
+        match = re.match(r"^/facility-service/([\w-]+)/(\d+)$", path)
+        if match:
+            return catalog.facility(*match.groups())
+        return None
+
+    def __handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # headers and body go out as separate writes, without this every response waits on a delayed ack
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                stub.count(parts.path)
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                status, body = stub.render(parts.path, parts.query)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class StubTransport(Transport):
+
+    def __init__(self, url):
+        """
+        Constructor Function
+        Rewrites the Disney and themeparks api hosts to url and sends the request through the client's pooled session.
+        """
+        self.url = url
+
+    def get(self, url, headers = None, timeout = None):
+        for host in (DISNEY_API, DISNEY_AUTH, THEMEPARKS_API):
+            if url.startswith(host):
+                url = self.url + url[len(host):]
+                break
+        return get_session().get(url, headers=headers, timeout=timeout)
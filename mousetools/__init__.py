@@ -10,7 +10,10 @@ from mousetools.characters import Character
 from mousetools.facilities import Facility
 from mousetools.pointsofinterest import PointOfInterest
 from mousetools.destinations import Destination
+from mousetools.aio import AsyncPark, AsyncEntertainmentVenue, AsyncAttraction, AsyncEntertainment, AsyncFacility, AsyncCharacter, AsyncPointOfInterest, AsyncDestination
 import mousetools.ids as ids
+import mousetools.client as client
+import mousetools.metrics as metrics
 
 __version__ = "2.1.1"
 
@@ -24,4 +27,12 @@ __all__ = [
     "Facility",
     "Character",
     "PointOfInterest",
+    "AsyncDestination",
+    "AsyncPark",
+    "AsyncEntertainmentVenue",
+    "AsyncAttraction",
+    "AsyncEntertainment",
+    "AsyncFacility",
+    "AsyncCharacter",
+    "AsyncPointOfInterest",
     ]
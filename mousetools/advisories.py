@@ -0,0 +1,63 @@
+"""
+advisories module
+advisory documents, downloaded once per advisory id and shared by every park, venue and destination that lists them
+"""
+import time
+import threading
+from .client import get_json
+from .workers import map_concurrent
+
+# Seconds an advisory is reused before it is downloaded again
+default_max_age = 60*60
+
+_advisories = {}
+_lock = threading.Lock()
+
+
+def get_advisory_id(entry):
+    """Returns the advisory id of an entry of a facility's advisories list"""
+    id = entry.get('id')
+    if not isinstance(id, str):
+        id = entry['links']['self']['href'].split('/')[-1].split('?')[0]
+    return id.split(';')[0]
+
+def get_advisory(entry, max_age = None):
+    """
+    Returns an advisory in the form of {id, name} from an entry of a facility's advisories list.
+    It is only downloaded if no one downloaded it in the last max_age seconds (default default_max_age).
+    """
+    if max_age is None:
+        max_age = default_max_age
+
+    id = get_advisory_id(entry)
+    with _lock:
+        cached = _advisories.get(id)
+    if cached is not None and time.monotonic() - cached[0] < max_age:
+        return cached[1]
+
+    data = get_json(entry['links']['self']['href'])
+    advisory = {'id': data['id'], 'name': data['name']}
+    with _lock:
+        _advisories[id] = (time.monotonic(), advisory)
+    return advisory
+
+def get_advisories(entries, max_age = None, max_workers = None):
+    """
+    Returns a list of advisories in the form of [{id, name}] from a facility's advisories list, one per advisory id.
+    Advisories that aren't cached are downloaded at once using at most max_workers threads (default workers.max_workers).
+    Raises the first error if an advisory couldn't be downloaded.
+    """
+    unique = {}
+    for entry in entries:
+        unique.setdefault(get_advisory_id(entry), entry)
+
+    advisories, errors = map_concurrent(lambda id: get_advisory(unique[id], max_age), list(unique), max_workers)
+    for id in unique:
+        if id in errors:
+            raise errors[id]
+    return [dict(advisory) for advisory in advisories]
+
+def clear():
+    """Forgets every downloaded advisory"""
+    with _lock:
+        _advisories.clear()
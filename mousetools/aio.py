@@ -0,0 +1,175 @@
+"""
+aio module
+asyncio versions of the entity classes
+"""
+import asyncio
+import weakref
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .parks import Park
+from .attractions import Attraction
+from .entertainments import Entertainment
+from .entertainmentvenues import EntertainmentVenue
+from .characters import Character
+from .facilities import Facility
+from .pointsofinterest import PointOfInterest
+from .destinations import Destination
+
+# Requests in flight at once across every event loop, keep it in line with client pool sizes
+max_concurrency = 20
+
+_executor = None
+# One semaphore per event loop, dropped when the loop is garbage collected
+_semaphores = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def set_max_concurrency(n):
+    """Changes how many library calls may run at once. Calls already running are not affected"""
+    global max_concurrency
+    global _executor
+
+    with _lock:
+        max_concurrency = n
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+        _semaphores.clear()
+
+def _get_executor():
+    global _executor
+
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="mousetools")
+        return _executor
+
+def _get_semaphore():
+    loop = asyncio.get_running_loop()
+    with _lock:
+        if loop not in _semaphores:
+            _semaphores[loop] = asyncio.Semaphore(max_concurrency)
+        return _semaphores[loop]
+
+async def run(func, *args, **kwargs):
+    """
+    Awaits a blocking library call.
+    The call runs on the library's worker pool, which goes through the shared client session, so at most max_concurrency run at once.
+    """
+    async with _get_semaphore():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+
+class AsyncEntity(object):
+
+    entity_class = None
+    network_methods = ()
+
+    def __init__(self, entity):
+        """
+        Constructor Function
+        Wraps an already built entity. Use `await cls.create(id)` to build one without blocking the event loop.
+        Methods that go to the network return coroutines, everything else is answered from the wrapped entity directly.
+        While a lazy entity isn't loaded every method except get_id returns a coroutine, since any of them may download its data.
+        """
+        self.__entity = entity
+
+    @classmethod
+    async def create(cls, id = None, lazy = False):
+        """
+        Builds the entity on the worker pool and returns it wrapped.
+        If lazy is True, the entity only stores its id so it is built right away, see the entity classes and load
+        """
+        if lazy:
+            return cls(cls.entity_class(id, lazy=True))
+        return cls(await run(cls.entity_class, id))
+
+    @classmethod
+    async def create_many(cls, ids, lazy = False):
+        """Builds many entities concurrently and returns them in the same order as ids"""
+        return await asyncio.gather(*[cls.create(id, lazy) for id in ids])
+
+    async def load(self):
+        """Downloads the data of a lazy entity on the worker pool, after which its getters answer directly again. Returns self"""
+        if not self.__entity._loaded:
+            await run(self.__entity._load)
+        return self
+
+    def get_entity(self):
+        """Returns the wrapped blocking entity"""
+        return self.__entity
+
+    def get_id(self):
+        """Returns the id of the wrapped entity, which is known without loading it"""
+        return self.__entity.get_id()
+
+    def __getattr__(self, name):
+        attr = getattr(self.__entity, name)
+        if name in self.network_methods or (callable(attr) and not self.__entity._loaded):
+            return functools.partial(run, attr)
+        return attr
+
+    def __eq__(self, other):
+        """
+        Checks if objects are equal
+        """
+        return self.get_id() == other.get_id()
+
+    def __hash__(self):
+        return hash(self.get_id())
+
+    def __str__(self):
+        if not self.__entity._loaded:
+            return 'Async {} object for {} (not loaded)'.format(type(self.__entity).__name__, self.get_id())
+        return 'Async {}'.format(self.__entity)
+
+
+class AsyncPark(AsyncEntity):
+    entity_class = Park
+    network_methods = ("refresh", "get_possible_ids", "get_wait_time_snapshot", "get_themeparkapi_data", "get_wait_times", "get_wait_times_detailed", "get_attraction_wait_times",
+                       "get_attraction_wait_times_detailed", "get_entertainment_wait_times", "get_entertainment_wait_times_detailed", "get_wait_times_columns", "get_hours",
+                       "get_hours_range", "get_advisories", "get_entertainment_ids")
+
+
+class AsyncAttraction(AsyncEntity):
+    entity_class = Attraction
+    network_methods = ("refresh", "get_themeparkapi_data", "get_wait_time", "get_status", "fastpass_available", "get_last_update_time", "get_hours", "get_hours_range",
+                       "check_associated_characters", "get_number_associated_characters", "get_associated_characters", "get_associated_character_ids")
+
+
+class AsyncEntertainment(AsyncEntity):
+    entity_class = Entertainment
+    network_methods = ("refresh", "get_possible_ids", "get_themeparkapi_data", "get_wait_time", "get_status", "fastpass_available", "get_last_update_time",
+                       "get_facets", "check_associated_characters", "get_number_associated_characters", "get_associated_characters",
+                       "get_associated_character_ids", "get_related_locations", "get_schedule")
+
+
+class AsyncEntertainmentVenue(AsyncEntity):
+    entity_class = EntertainmentVenue
+    network_methods = ("refresh", "get_possible_ids", "get_hours", "get_hours_range", "get_advisories")
+
+
+class AsyncCharacter(AsyncEntity):
+    entity_class = Character
+    network_methods = ("refresh", "get_related_locations", "get_associated_events")
+
+
+class AsyncFacility(AsyncEntity):
+    entity_class = Facility
+    network_methods = ("refresh", "get_todays_hours", "get_hours_range")
+
+
+class AsyncPointOfInterest(AsyncEntity):
+    entity_class = PointOfInterest
+    network_methods = ("refresh",)
+
+
+class AsyncDestination(AsyncEntity):
+    entity_class = Destination
+    network_methods = ("refresh", "get_attraction_ids", "get_entertainment_ids", "get_park_ids", "get_entertainment_venue_ids", "get_character_ids",
+                       "get_wait_time_snapshot", "get_themeparkapi_data", "get_wait_times", "get_wait_times_detailed", "get_attraction_wait_times",
+                       "get_attraction_wait_times_detailed", "get_entertainment_wait_times", "get_entertainment_wait_times_detailed",
+                       "get_wait_times_columns", "get_showtimes", "get_advisories", "get_attraction_characters", "prefetch",
+                       "get_spatial_index", "get_raw_calendar_data", "get_refurbishments", "get_closed")
@@ -1,25 +1,37 @@
 """
 attractions module
 """
-import json
-from datetime import datetime, timedelta
-import requests
+from datetime import datetime
 import pytz
-from .auth import get_headers
-from .ids import themeparkapi_ids, WDW_ID, DLR_ID
+from copy import deepcopy
+from .client import get_json
+from .workers import map_concurrent
+from .schedules import get_schedule, get_hours_range
+from .waittimes import get_snapshot, find_entry, find_raw_entry
+from .ids import themeparkapi_ids
+from .entity import Entity, get_ancestor_ids, get_time_zone, get_park_time_zone, get_associated_characters_url, get_associated_character_ids
 
 
 
-class Attraction:
+class Attraction(Entity):
+    __slots__ = ("__id", "__data", "__name", "__entityType", "__subType", "__anc_dest_id", "__anc_park_id", "__anc_resort_id", "__anc_land_id", "__anc_ra_id", "__anc_ev_id", "__time_zone", "__characters")
 
-    def __init__(self, id = None):
+    def __init__(self, id = None, lazy = False):
         """
         Constructor Function
         Gets all attraction data available and stores various elements into variables.
+        If lazy is True, only the id is stored and the data is downloaded the first time something needs it.
         """
-
+        self.__id = None if id is None else str(id)
+        self._loaded = False
+        if not lazy:
+            self._load()
+
+    def _load(self, use_cache = True):
+        """Downloads the attraction data and stores various elements into variables"""
+        id = self.__id
         error = True
-        self.__data = requests.get(f"https://api.wdpro.disney.go.com/global-pool-override-B/facility-service/attractions/{id}", headers=get_headers()).json()
+        self.__data = get_json(f"https://api.wdpro.disney.go.com/global-pool-override-B/facility-service/attractions/{id}", use_cache=use_cache)
         try:
             if self.__data['id'] is not None:
                 error = False
@@ -32,69 +44,21 @@ class Attraction:
         self.__id = id
         self.__name = self.__data['name']
         self.__entityType = self.__data['type']
-        try:
-            self.__subType = self.__data['subType']
-        except:
-            self.__subType = None
-
-        try:
-            self.__anc_dest_id = self.__data['ancestorDestination']['id'].split(';')[0]
-        except:
-            self.__anc_dest_id = None
+        self.__subType = self.__data.get('subType')
+        self.__anc_dest_id, self.__anc_park_id, self.__anc_resort_id, self.__anc_land_id, self.__anc_ra_id, self.__anc_ev_id = get_ancestor_ids(self.__data)
+        self.__time_zone = get_time_zone(self.__anc_dest_id)
+        self.__characters = None
 
-        try:
-            self.__anc_park_id = self.__data['links']['ancestorThemePark']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_park_id = self.__data['links']['ancestorWaterPark']['href'].split('/')[-1].split('?')[0]
-            except:
-                try:
-                    self.__anc_park_id = self.__data['ancestorThemeParkId'].split(';')[0]
-                except:
-                    try:
-                        self.__anc_park_id = self.__data['ancestorWaterParkId'].split(';')[0]
-                    except:
-                        self.__anc_park_id = None
-
-        try:
-            self.__anc_resort_id = self.__data['links']['ancestorResort']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_resort_id = self.__data['ancestorResortId'].split(';')[0]
-            except:
-                self.__anc_resort_id = None
-
-        try:
-            self.__anc_land_id = self.__data['links']['ancestorLand']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_land_id = self.__data['ancestorLandId'].split(';')[0]
-            except:
-                self.__anc_land_id = None
-
-        try:
-            self.__anc_ra_id = self.__data['links']['ancestorResortArea']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_ra_id = self.__data['ancestorResortAreaId'].split(';')[0]
-            except:
-                self.__anc_ra_id = None
-
-        try:
-            self.__anc_ev_id = self.__data['links']['ancestorEntertainmentVenue']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_ev_id = self.__data['ancestorEntertainmentVenueId'].split(';')[0]
-            except:
-                self.__anc_ev_id = None
-
-        if self.__anc_dest_id == WDW_ID:
-            self.__time_zone = pytz.timezone('US/Eastern')
-        elif self.__anc_dest_id == DLR_ID:
-            self.__time_zone = pytz.timezone('US/Pacific')
-        else:
-            self.__time_zone = pytz.utc
+        self._loaded = True
 
+    @classmethod
+    def bulk(cls, ids, max_workers = None):
+        """
+        Creates many Attraction objects concurrently instead of one after another.
+        Returns a tuple (attractions, errors): the objects that could be created, in the same order as ids,
+        and the ids that failed in the form of {id: exception}
+        """
+        return map_concurrent(cls, ids, max_workers)
 
     def get_id(self):
         """Return object id"""
@@ -138,7 +102,7 @@ class Attraction:
 
     def get_links(self):
         """Returns a dictionary of related links"""
-        return self.__data['links']
+        return deepcopy(self.__data['links'])
 
     def get_time_zone(self):
         """Returns pytz timezone object"""
@@ -146,17 +110,14 @@ class Attraction:
 
     def get_raw_data(self):
         """Returns the raw data from global-facility-service"""
-        return self.__data
+        return deepcopy(self.__data)
 
-    def get_themeparkapi_data(self):
+    def get_themeparkapi_data(self, max_age = None):
         """Returns the dictionary from the themepark api for the given id"""
-        park = themeparkapi_ids[self.__anc_park_id]
-        themepark_id = f"{park}_{self.__id}"
-        all_data = requests.get(f"https://api.themeparks.wiki/preview/parks/{park}/waittime").json()
-        for i in all_data:
-            if i["id"] == themepark_id:
-                return i
-        return None
+        if not self._loaded:
+            # a lazy object looks itself up in every park's wait times rather than downloading its data to learn its park
+            return find_raw_entry(self.__id, max_age)
+        return get_snapshot(themeparkapi_ids[self.__anc_park_id], max_age).get_raw_entry(self.__id)
 
     def get_wait_time(self):
         """Return current wait time of the object. Returns None if object doesn't have a wait time or no wait currently exists (eg. closed)"""
@@ -184,19 +145,25 @@ class Attraction:
 
     def get_last_update_time(self):
         """Returns facilities last update time as a datetime object"""
-        facility_data = self.get_themeparkapi_data()
+        if not self._loaded:
+            # a lazy object takes its time zone from the park that lists it rather than from its data
+            park, facility_data = find_entry(self.__id)
+            time_zone = get_park_time_zone(park)
+        else:
+            facility_data = self.get_themeparkapi_data()
+            time_zone = self.__time_zone
         if facility_data is None:
             return None
 
         update_time = datetime.strptime(facility_data['lastUpdate'], "%Y-%m-%dT%H:%M:%S.%fZ")
         update_time = update_time.replace(tzinfo=pytz.utc)
-        update_time = update_time.astimezone(self.__time_zone)
+        update_time = update_time.astimezone(time_zone)
         return update_time
 
     def get_coordinates(self):
         """Returns the object's latitude and longitude"""
         try:
-            return self.__data['coordinates']['Guest Entrance']['gps']
+            return deepcopy(self.__data['coordinates']['Guest Entrance']['gps'])
         except:
             return None
 
@@ -217,7 +184,7 @@ class Attraction:
         if facility_data is None:
             return None
 
-        return facility_data['media']
+        return deepcopy(facility_data['media'])
 
     def get_facets(self):
         """Returns a list of  dictionaries of the object's facets"""
@@ -226,7 +193,7 @@ class Attraction:
             return None
 
         try:
-            return facility_data['facets']
+            return deepcopy(facility_data['facets'])
         except:
             return None
 
@@ -261,104 +228,49 @@ class Attraction:
         If you don't pass a date, it will get today's hours
         """
 
-        if date == "":
-            DATE = datetime.today()
-        else:
-            year, month, day = date.split('-')
-            DATE = datetime(int(year), int(month), int(day))
-
-        s = requests.get(f"https://api.wdpro.disney.go.com/facility-service/schedules/{self.__id}?date={DATE.year}-{self.__formatDate(str(DATE.month))}-{self.__formatDate(str(DATE.day))}", headers=get_headers())
-        data = json.loads(s.content)
-
-        operating_hours_start = None
-        operating_hours_end = None
-        extra_hours_start = None
-        extra_hours_end = None
+        return get_schedule(self.__id, date).get_hours()
 
-        try:
-            for i in range(len(data['schedules'])):
-                if data['schedules'][i]['type'] == 'Operating':
-                    operating_hours_start = datetime(DATE.year, DATE.month, DATE.day, int(data['schedules'][i]['startTime'][0:2]), int(data['schedules'][i]['startTime'][3:5]))
-                    if int(data['schedules'][i]['endTime'][0:2]) >= 0 and int(data['schedules'][i]['endTime'][0:2]) <= 7:
-                        DATETEMP = DATE + timedelta(days=1)
-                        operating_hours_end = datetime(DATETEMP.year, DATETEMP.month, DATETEMP.day, int(data['schedules'][i]['endTime'][0:2]), int(data['schedules'][i]['endTime'][3:5]))
-                    else:
-                        operating_hours_end = datetime(DATE.year, DATE.month, DATE.day, int(data['schedules'][i]['endTime'][0:2]), int(data['schedules'][i]['endTime'][3:5]))
-
-                if data['schedules'][i]['type'] == "Special Ticketed Event":
-                    extra_hours_start = datetime(DATE.year, DATE.month, DATE.day, int(data['schedules'][i]['startTime'][0:2]), int(data['schedules'][i]['startTime'][3:5]))
-                    if int(data['schedules'][i]['endTime'][0:2]) >= 0 and int(data['schedules'][i]['endTime'][0:2]) <= 7:
-                        DATETEMP = DATE + timedelta(days=1)
-                        extra_hours_end = datetime(DATETEMP.year, DATETEMP.month, DATETEMP.day, int(data['schedules'][i]['endTime'][0:2]), int(data['schedules'][i]['endTime'][3:5]))
-                    else:
-                        operating_hours_end = datetime(DATE.year, DATE.month, DATE.day, int(data['schedules'][i]['endTime'][0:2]), int(data['schedules'][i]['endTime'][3:5]))
-
-        except KeyError:
-            pass
-        return operating_hours_start, operating_hours_end, extra_hours_start, extra_hours_end
+    def get_hours_range(self, start, end):
+        """
+        Returns a dictionary of the object's hours for every date from start to end in the form of {"YYYY-MM-DD": (operating open, operating close, Extra Magic open, Extra Magic close)}
+        start, end = "YYYY-MM-DD", both included
+        Dates that weren't already downloaded are downloaded at once.
+        """
+        return get_hours_range(self.__id, start, end)
 
     def check_associated_characters(self):
         """
         Checks if object has any associated characters
         """
-        s = requests.get("https://api.wdpro.disney.go.com/global-pool-override-B/facility-service/associated-characters/{};entityType={}".format(self.__id, self.__entityType), headers=get_headers())
-        data = json.loads(s.content)
-
-        if data['total'] > 0:
-            return True
-        else:
-            return False
+        return self.get_number_associated_characters() > 0
 
     def get_number_associated_characters(self):
         """
         Gets the total number of characters associated with this object
         """
-        s = requests.get("https://api.wdpro.disney.go.com/facility-service/associated-characters/{};entityType={}".format(self.__id, self.__entityType), headers=get_headers())
-        data = json.loads(s.content)
-
-        return data['total']
+        return self.__get_associated_characters_data()['total']
 
-    def get_associated_characters(self):
+    def get_associated_characters(self, max_workers = None):
         """
-        Returns a list of associated characters Character objects
+        Returns a list of associated characters Character objects.
+        The characters are created concurrently, the ones that can't be created are left out.
         """
         from .characters import Character
-        chars = []
 
-        s = requests.get("https://api.wdpro.disney.go.com/global-pool-override-B/facility-service/associated-characters/{};entityType={}".format(self.__id, self.__entityType), headers=get_headers())
-        data = json.loads(s.content)
-
-        for i in range(len(data['entries'])):
-            try:
-                chars.append(Character(data['entries'][i]['links']['self']['href'].split('/')[-1]))
-            except:
-                pass
+        chars, errors = Character.bulk(self.get_associated_character_ids(), max_workers)
         return chars
 
     def get_associated_character_ids(self):
         """
         Returns a list of associated characters IDs
         """
-        chars = []
-
-        s = requests.get("https://api.wdpro.disney.go.com/global-pool-override-B/facility-service/associated-characters/{};entityType={}".format(self.__id, self.__entityType), headers=get_headers())
-        data = json.loads(s.content)
+        return get_associated_character_ids(self.__get_associated_characters_data())
 
-        for i in range(len(data['entries'])):
-            try:
-                chars.append(data['entries'][i]['links']['self']['href'].split('/')[-1])
-            except:
-                pass
-
-        return chars
-
-    def __formatDate(self, num):
-        """
-        Formats month and day into proper format
-        """
-        if len(num) < 2:
-            num = '0'+num
-        return num
+    def __get_associated_characters_data(self):
+        """Returns the associated-characters document of the object, downloaded the first time it is needed"""
+        if self.__characters is None:
+            self.__characters = get_json(get_associated_characters_url(self.__id, self.__entityType))
+        return self.__characters
 
     def __eq__(self, other):
         """
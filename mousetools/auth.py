@@ -1,6 +1,7 @@
-import requests
-import json
-from datetime import datetime, timedelta
+import time
+import threading
+from . import client
+from .metrics import registry
 
 
 def disney_authentication():
@@ -16,26 +17,90 @@ def disney_authentication():
         'Proxy-Connection' : 'keep-alive',
         'Accept-Encoding' : 'gzip, deflate'
     }
-    auth = requests.get("https://disneyworld.disney.go.com/authentication/get-client-token", headers=headers, timeout=10).json()
+    auth = client.get("https://disneyworld.disney.go.com/authentication/get-client-token", authenticated=False, headers=headers, timeout=10).json()
     return auth['access_token'], auth['expires_in']
 
 
-time_of_expire = None
-access_token = None
+class TokenManager(object):
 
-def get_headers():
-    """Creates the headers to send during the request and returns it"""
+    def __init__(self, refresh_margin = 10, background_refresh = 120):
+        """
+        Constructor Function
+        Keeps one access token and its headers for every thread.
+        The token is treated as expired refresh_margin seconds before Disney says it is. Once it is within background_refresh seconds
+        of that, or half its lifetime for short-lived tokens, callers keep getting the current headers while a single background thread fetches the next token.
+        """
+        self.__refresh_margin = refresh_margin
+        self.__background_window = background_refresh
+        self.__lock = threading.Lock()
+        self.__headers = None
+        self.__time_of_expire = 0
+        self.__time_of_background_refresh = 0
+        self.__next_background_attempt = 0
+
+    def get_headers(self):
+        """
+        Returns the cached headers, refreshing the token first if it has expired.
+        If many threads find the token expired at once, only one of them authenticates and the rest wait for its result.
+        The returned dictionary is shared, do not modify it.
+        """
+        headers = self.__headers
+        now = time.monotonic()
+
+        if headers is not None and now < self.__time_of_expire:
+            if now > self.__time_of_background_refresh and now > self.__next_background_attempt:
+                self.__start_background_refresh()
+            return headers
+
+        with self.__lock:
+            if self.__headers is None or time.monotonic() >= self.__time_of_expire:
+                self.__refresh()
+            return self.__headers
+
+    def invalidate(self):
+        """Forgets the current token so the next call to get_headers authenticates again"""
+        with self.__lock:
+            self.__headers = None
+            self.__time_of_expire = 0
+            self.__time_of_background_refresh = 0
 
-    global time_of_expire
-    global access_token
+    def __refresh(self):
+        """Authenticates and stores the new headers. The caller must hold the lock"""
+        try:
+            access_token, expires_in = disney_authentication()
+        except Exception:
+            registry.record_token_refresh(ok=False)
+            raise
+        registry.record_token_refresh()
+        self.__headers = {"Authorization":"BEARER {}".format(access_token), "User-Agent":'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36', "Content-Type":"application/json;charset=UTF-8","Accept":"*/*"}
+        lifetime = expires_in - self.__refresh_margin
+        self.__time_of_expire = time.monotonic() + lifetime
+        # a token that lives less than twice the window would be refreshed for most of its life, so it gets half of it instead
+        self.__time_of_background_refresh = self.__time_of_expire - min(self.__background_window, max(lifetime, 0) / 2)
 
-    if time_of_expire == None or (datetime.now() > time_of_expire):
-        access_token, expires_in = disney_authentication()
-        time_of_expire = datetime.now() + timedelta(seconds=(expires_in-10))
+    def __start_background_refresh(self):
+        if not self.__lock.acquire(blocking=False):
+            return
 
-    headers = {"Authorization":"BEARER {}".format(access_token), "User-Agent":'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36', "Content-Type":"application/json;charset=UTF-8","Accept":"*/*"}
+        self.__next_background_attempt = time.monotonic() + 5
+        threading.Thread(target=self.__background_refresh, daemon=True).start()
 
-    return headers
+    def __background_refresh(self):
+        """Runs in its own thread holding the lock taken by __start_background_refresh"""
+        try:
+            self.__refresh()
+        except Exception:
+            # the current token is still valid, a foreground call will retry once it expires
+            pass
+        finally:
+            self.__lock.release()
+
+
+token_manager = TokenManager()
+
+def get_headers():
+    """Creates the headers to send during the request and returns it"""
+    return token_manager.get_headers()
 
 if __name__ == '__main__':
 
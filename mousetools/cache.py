@@ -0,0 +1,110 @@
+"""
+cache module
+in memory response cache with a freshness policy per kind of endpoint
+"""
+import re
+import time
+import threading
+from collections import OrderedDict
+
+# [name, url pattern, ttl in seconds]. The first pattern that matches a url decides how long it is kept.
+# Urls that match none of them, like the authentication endpoint, are never cached.
+# Schedules are keyed by their full url, so every (id, date) pair is its own entry.
+# Wait times are not cached here, their snapshots are kept by the waittimes module (see waittimes.default_max_age).
+policies = [
+    ["schedule", re.compile(r"/facility-service/schedules/[^/?]+\?date="), 60*60],
+    ["advisory", re.compile(r"/facility-service/advisories/"), 60*60],
+    ["facility", re.compile(r"^https://api\.wdpro\.disney\.go\.com/.*facility-service/"), 24*60*60],
+]
+
+
+def get_policy(url):
+    """Returns the (name, ttl) of the policy that applies to url, or (None, None) if it should not be cached"""
+    for name, pattern, ttl in policies:
+        if pattern.search(url):
+            return name, ttl
+    return None, None
+
+def set_ttl(name, ttl):
+    """Changes the ttl in seconds of a policy, e.g. set_ttl("schedule", 30*60). A ttl of 0 stops caching that kind of endpoint"""
+    for policy in policies:
+        if policy[0] == name:
+            policy[2] = ttl
+            return
+    raise ValueError('That cache policy is not available. name: {}. Available policies: {}'.format(name, ", ".join(p[0] for p in policies)))
+
+
+class ResponseCache(object):
+
+    def __init__(self, maxsize = 2048):
+        """
+        Constructor Function
+        Keeps at most maxsize decoded responses, evicting the least recently used one when full.
+        Values are stored and returned as they are, not copied, so they must not be modified. The entity getters return copies.
+        """
+        self.maxsize = maxsize
+        self.enabled = True
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = {}
+        self.__misses = {}
+        self.__evictions = 0
+
+    def get(self, url):
+        """Returns a tuple (found, value) for url, found is False if there is no fresh entry"""
+        name, ttl = get_policy(url)
+        if name is None or not self.enabled:
+            return False, None
+
+        with self.__lock:
+            entry = self.__entries.get(url)
+            if entry is not None and time.monotonic() - entry[0] < ttl:
+                self.__entries.move_to_end(url)
+                self.__hits[name] = self.__hits.get(name, 0) + 1
+                return True, entry[1]
+
+            if entry is not None:
+                del self.__entries[url]
+            self.__misses[name] = self.__misses.get(name, 0) + 1
+            return False, None
+
+    def set(self, url, value):
+        """Stores value for url if a policy applies to it"""
+        name, ttl = get_policy(url)
+        if name is None or not ttl or not self.enabled or self.maxsize <= 0:
+            return
+
+        with self.__lock:
+            self.__entries[url] = (time.monotonic(), value)
+            self.__entries.move_to_end(url)
+            while len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last=False)
+                self.__evictions += 1
+
+    def invalidate(self, url):
+        """Removes url from the cache"""
+        with self.__lock:
+            self.__entries.pop(url, None)
+
+    def clear(self):
+        """Removes every entry and resets the stats"""
+        with self.__lock:
+            self.__entries.clear()
+            self.__hits.clear()
+            self.__misses.clear()
+            self.__evictions = 0
+
+    def stats(self):
+        """Returns a dictionary of the cache's size, hits and misses per policy and evictions"""
+        with self.__lock:
+            return {
+                'size': len(self.__entries),
+                'maxsize': self.maxsize,
+                'hits': sum(self.__hits.values()),
+                'misses': sum(self.__misses.values()),
+                'evictions': self.__evictions,
+                'policies': {name: {'hits': self.__hits.get(name, 0), 'misses': self.__misses.get(name, 0)} for name, pattern, ttl in policies},
+            }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,90 @@
+"""
+catalog module
+every park, attraction, entertainment, entertainment venue and character of a destination, loaded at once and kept in memory by id
+"""
+import threading
+
+# Kinds of entities a catalog holds, in the order they are listed
+KINDS = ("parks", "attractions", "entertainments", "entertainment_venues", "characters")
+
+_catalogs = {}
+_lock = threading.Lock()
+
+
+class Catalog(object):
+
+    def __init__(self, destination, ids, entities, errors = None):
+        """
+        Constructor Function
+        ids = {kind: [ids as Disney lists them]}, entities = {kind: [loaded objects]}, errors = {id or kind: exception}
+        Holds a reference to every object, so while the catalog is registered (see register) constructing any of its ids
+        returns the loaded instance without a request.
+        """
+        self.__destination = destination
+        self.__ids = {kind: list(ids[kind]) for kind in KINDS if kind in ids}
+        self.__entities = {kind: list(entities.get(kind, [])) for kind in KINDS}
+        self.__errors = {} if errors is None else errors
+        self.__index = {}
+        for kind in KINDS:
+            for entity in self.__entities[kind]:
+                self.__index.setdefault(str(entity.get_id()), entity)
+
+    def get_destination(self):
+        """Returns the Destination object of the catalog"""
+        return self.__destination
+
+    def get_destination_id(self):
+        """Returns the id of the destination of the catalog"""
+        return self.__destination.get_id()
+
+    def get(self, id):
+        """Returns the object of an id, None if it isn't in the catalog"""
+        return self.__index.get(str(id))
+
+    def get_ids(self, kind = None):
+        """Returns the list of ids Disney lists for a kind (e.g. "attractions"), or of every kind, including the ones that couldn't be loaded"""
+        if kind is None:
+            return [id for kind in KINDS for id in self.__ids.get(kind, [])]
+        return list(self.__ids.get(kind, []))
+
+    def has_ids(self, kind):
+        """Returns whether the list of ids of a kind was downloaded"""
+        return kind in self.__ids
+
+    def get_entities(self, kind = None):
+        """Returns the list of loaded objects of a kind (e.g. "attractions"), or of every kind"""
+        if kind is None:
+            return [entity for kind in KINDS for entity in self.__entities[kind]]
+        return list(self.__entities[kind])
+
+    def get_errors(self):
+        """Returns the ids, or kinds whose list couldn't be downloaded, that failed in the form of {id: exception}"""
+        return self.__errors
+
+    def __contains__(self, id):
+        return str(id) in self.__index
+
+    def __len__(self):
+        return len(self.__index)
+
+    def __str__(self):
+        return 'Catalog object for {} with {} entities'.format(self.get_destination_id(), len(self))
+
+
+def register(catalog):
+    """Keeps catalog for the rest of the process, replacing the one of the same destination"""
+    with _lock:
+        _catalogs[str(catalog.get_destination_id())] = catalog
+
+def get_catalog(destination_id):
+    """Returns the registered Catalog of a destination, None if it hasn't been prefetched"""
+    with _lock:
+        return _catalogs.get(str(destination_id))
+
+def forget(destination_id = None):
+    """Drops the catalog of a destination, or every catalog if None, so its objects can be freed and its ids are listed from Disney again"""
+    with _lock:
+        if destination_id is None:
+            _catalogs.clear()
+        else:
+            _catalogs.pop(str(destination_id), None)
@@ -1,24 +1,32 @@
-import requests
-import pytz
-from datetime import datetime, timedelta
-from .auth import get_headers
+from copy import deepcopy
+from .client import get_json
+from .workers import map_concurrent
 from .attractions import Attraction
 from .entertainments import Entertainment
 from .facilities import Facility
-from .ids import WDW_ID, DLR_ID
+from .entity import Entity, get_ancestor_ids, get_time_zone
 
 
 
-class Character(object):
+class Character(Entity):
+    __slots__ = ("__id", "__data", "__name", "__entityType", "__subType", "__anc_dest_id", "__anc_park_id", "__anc_resort_id", "__anc_land_id", "__anc_ra_id", "__anc_ev_id", "__time_zone")
 
-    def __init__(self, id = None):
+    def __init__(self, id = None, lazy = False):
         """
         Constructor Function
         Gets all character data available and stores various elements into variables.
+        If lazy is True, only the id is stored and the data is downloaded the first time something needs it.
         """
-
+        self.__id = None if id is None else str(id)
+        self._loaded = False
+        if not lazy:
+            self._load()
+
+    def _load(self, use_cache = True):
+        """Downloads the character data and stores various elements into variables"""
+        id = self.__id
         error = True
-        self.__data = requests.get("https://api.wdpro.disney.go.com/facility-service/characters/{}".format(id), headers=get_headers()).json()
+        self.__data = get_json("https://api.wdpro.disney.go.com/facility-service/characters/{}".format(id), use_cache=use_cache)
         try:
             if self.__data['id'] is not None:
                 error = False
@@ -31,68 +39,20 @@ class Character(object):
         self.__id = id
         self.__name = self.__data['name']
         self.__entityType = self.__data['type']
-        try:
-            self.__subType = self.__data['subType']
-        except:
-            self.__subType = None
-        try:
-            self.__anc_dest_id = self.__data['ancestorDestination']['id'].split(';')[0]
-        except:
-            self.__anc_dest_id = None
-
-        try:
-            self.__anc_park_id = self.__data['links']['ancestorThemePark']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_park_id = self.__data['links']['ancestorWaterPark']['href'].split('/')[-1].split('?')[0]
-            except:
-                try:
-                    self.__anc_park_id = self.__data['ancestorThemeParkId'].split(';')[0]
-                except:
-                    try:
-                        self.__anc_park_id = self.__data['ancestorWaterParkId'].split(';')[0]
-                    except:
-                        self.__anc_park_id = None
+        self.__subType = self.__data.get('subType')
+        self.__anc_dest_id, self.__anc_park_id, self.__anc_resort_id, self.__anc_land_id, self.__anc_ra_id, self.__anc_ev_id = get_ancestor_ids(self.__data)
+        self.__time_zone = get_time_zone(self.__anc_dest_id)
 
-        try:
-            self.__anc_resort_id = self.__data['links']['ancestorResort']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_resort_id = self.__data['ancestorResortId'].split(';')[0]
-            except:
-                self.__anc_resort_id = None
-
-        try:
-            self.__anc_land_id = self.__data['links']['ancestorLand']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_land_id = self.__data['ancestorLandId'].split(';')[0]
-            except:
-                self.__anc_land_id = None
-
-        try:
-            self.__anc_ra_id = self.__data['links']['ancestorResortArea']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_ra_id = self.__data['ancestorResortAreaId'].split(';')[0]
-            except:
-                self.__anc_ra_id = None
-
-        try:
-            self.__anc_ev_id = self.__data['links']['ancestorEntertainmentVenue']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_ev_id = self.__data['ancestorEntertainmentVenueId'].split(';')[0]
-            except:
-                self.__anc_ev_id = None
-
-        if self.__anc_dest_id == WDW_ID:
-            self.__time_zone = pytz.timezone('US/Eastern')
-        elif self.__anc_dest_id == DLR_ID:
-            self.__time_zone = pytz.timezone('US/Pacific')
-        else:
-            self.__time_zone = pytz.utc
+        self._loaded = True
 
+    @classmethod
+    def bulk(cls, ids, max_workers = None):
+        """
+        Creates many Character objects concurrently instead of one after another.
+        Returns a tuple (characters, errors): the objects that could be created, in the same order as ids,
+        and the ids that failed in the form of {id: exception}
+        """
+        return map_concurrent(cls, ids, max_workers)
 
     def get_id(self):
         """Return object id"""
@@ -140,11 +100,11 @@ class Character(object):
 
     def get_raw_data(self):
         """Returns the raw data from global-facility-service"""
-        return self.__data
+        return deepcopy(self.__data)
 
     def get_links(self):
         """Returns a dictionary of related links"""
-        return self.__data['links']
+        return deepcopy(self.__data['links'])
 
 
     def check_related_locations(self):
@@ -157,26 +117,22 @@ class Character(object):
         except:
             return False
 
-    def get_related_locations(self):
+    def get_related_locations(self, max_workers = None):
         """
-        Gets the locations the character is realted to.
+        Gets the locations the character is related to as Attraction and Facility objects, created concurrently.
+        Returns a tuple (locations, errors): the objects that could be created, in the order Disney lists them,
+        and the ids that failed or have no class at this time in the form of {id: exception}
         """
-        locs = []
-        try:
-            if self.check_related_locations():
-                for loc in self.__data['relatedLocations']['primaryLocations']:
-                    type = loc['facilityType']
-                    loc_id = loc['links']['self']['href'].split('/')[-1].split('?')[0]
+        classes = {'Attraction': Attraction, 'Facility': Facility}
 
-                    if type == 'Attraction':
-                        locs.append(Attraction(loc_id))
-                    elif type == 'Facility':
-                        locs.append(Facility(loc_id))
-                    else:
-                        print('no class for {} at this time'.format(type))
-            return locs
-        except:
-            return locs
+        def create(location):
+            loc_id, type = location
+            if type not in classes:
+                raise ValueError('no class for {} at this time'.format(type))
+            return classes[type](loc_id)
+
+        locs, errors = map_concurrent(create, self.get_related_location_ids(), max_workers)
+        return locs, {loc_id: e for (loc_id, type), e in errors.items()}
 
     def get_related_location_ids(self):
         """
@@ -195,22 +151,13 @@ class Character(object):
         except:
             return locs
 
-    def get_associated_events(self):
+    def get_associated_events(self, max_workers = None):
         """
-        Returns a list of Entertainment objects of events associated with the character.
-        Will print an error if the ID does not exist anymore. Unfortunately Disney, lists some events that don't exist, and thus will throw the error
-        when it tries to create the Entertainment object.
+        Gets the events associated with the character as Entertainment objects, created concurrently.
+        Disney lists some events that don't exist anymore, so returns a tuple (entertainments, errors): the objects that could be created,
+        in the order Disney lists them, and the ids that failed in the form of {id: exception}
         """
-        entertainments = []
-        try:
-            for entertainment in self.__data['associatedEvents']:
-                try:
-                    entertainments.append(Entertainment(entertainment['links']['self']['href'].split('/')[-1].split('?')[0]))
-                except:
-                    pass
-            return entertainments
-        except:
-            return entertainments
+        return Entertainment.bulk(self.get_associated_event_ids(), max_workers)
 
     def get_associated_event_ids(self):
         """
@@ -0,0 +1,154 @@
+"""
+client module
+one pooled, keep-alive HTTP session that every request in the library goes through
+"""
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from .cache import response_cache
+from . import store
+from .transport import RequestsTransport
+from .metrics import registry, get_caller
+
+DISNEY_API = "https://api.wdpro.disney.go.com"
+DISNEY_AUTH = "https://disneyworld.disney.go.com"
+THEMEPARKS_API = "https://api.themeparks.wiki"
+
+# Connections kept alive per host. Hosts not listed in pool_sizes share the default adapter.
+settings = {
+    'pool_sizes': {
+        DISNEY_API: 20,
+        THEMEPARKS_API: 10,
+        DISNEY_AUTH: 2,
+    },
+    'default_pool_size': 10,
+    'max_retries': 0,
+    'timeout': None,
+}
+
+_session = None
+_transport = None
+_lock = threading.Lock()
+
+
+def configure(pool_sizes=None, default_pool_size=None, max_retries=None, timeout=None):
+    """
+    Changes the connection pool settings of the shared session.
+    pool_sizes = {host: size}, e.g. {"https://api.wdpro.disney.go.com": 50}
+    Hosts given here are merged into the current settings. The current session is closed and rebuilt on next use.
+    """
+    with _lock:
+        if pool_sizes is not None:
+            settings['pool_sizes'].update(pool_sizes)
+        if default_pool_size is not None:
+            settings['default_pool_size'] = default_pool_size
+        if max_retries is not None:
+            settings['max_retries'] = max_retries
+        if timeout is not None:
+            settings['timeout'] = timeout
+
+    close()
+
+
+def get_session():
+    """Returns the shared requests session, creating it on first use"""
+    global _session
+
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                for prefix in ("https://", "http://"):
+                    session.mount(prefix, HTTPAdapter(pool_connections=len(settings['pool_sizes']) + 1, pool_maxsize=settings['default_pool_size'], max_retries=settings['max_retries']))
+                for host, size in settings['pool_sizes'].items():
+                    session.mount(host, HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=settings['max_retries']))
+                _session = session
+
+    return _session
+
+
+def close():
+    """Closes the shared session and all of its pooled connections"""
+    global _session
+
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def set_transport(transport):
+    """
+    Makes transport answer every request the library makes, e.g. a transport.ReplayTransport. None restores the network.
+    Returns the previous transport
+    """
+    global _transport
+
+    with _lock:
+        previous = _transport
+        _transport = transport
+        return previous
+
+def get_transport():
+    """Returns the transport currently answering requests"""
+    global _transport
+
+    if _transport is None:
+        with _lock:
+            if _transport is None:
+                _transport = RequestsTransport()
+    return _transport
+
+
+def get(url, authenticated=True, headers=None, timeout=None):
+    """
+    Sends a GET request through the current transport (by default the shared session) and returns the response.
+    The Disney authorization headers are added unless authenticated is False. Every request is recorded in metrics.registry.
+    """
+    if authenticated:
+        from .auth import get_headers
+        headers = dict(get_headers(), **(headers or {}))
+
+    if timeout is None:
+        timeout = settings['timeout']
+
+    caller = get_caller() if registry.enabled else None
+    start = time.perf_counter()
+    try:
+        response = get_transport().get(url, headers=headers, timeout=timeout)
+    except Exception:
+        registry.record(url, None, time.perf_counter() - start, 0, caller)
+        raise
+    registry.record(url, response.status_code, time.perf_counter() - start, len(response.content), caller)
+    return response
+
+
+def get_json(url, authenticated=True, use_cache=True, timeout=None):
+    """
+    Returns the decoded json at url, from the response cache or the local store (see store.enable) if either holds a fresh copy.
+    Successful responses are saved to both. Pass use_cache=False to always go to the network.
+    The returned data is shared with the cache and every other caller of the same url, treat it as read-only.
+    timeout is the request timeout in seconds, settings['timeout'] if None
+    """
+    local_store = store.get_active()
+
+    if use_cache:
+        found, data = response_cache.get(url)
+        if found:
+            return data
+
+        if local_store is not None:
+            found, data = local_store.get(url)
+            if found:
+                response_cache.set(url, data)
+                return data
+
+    response = get(url, authenticated=authenticated, timeout=timeout)
+    data = response.json()
+    if response.ok:
+        response_cache.set(url, data)
+        if local_store is not None:
+            local_store.set(url, data)
+
+    return data
@@ -1,22 +1,43 @@
-import requests
-from datetime import datetime, timedelta
-import pytz
-from .auth import get_headers
+from datetime import datetime
+from copy import deepcopy
+from .client import get_json
+from . import store
+from .workers import map_concurrent
+from .schedules import get_showtimes
+from .advisories import get_advisory, get_advisory_id
+from .catalog import Catalog, register, get_catalog, forget
+from .spatial import SpatialIndex
+from .waittimes import WaitTimeSnapshot, WaitTimeStream, get_snapshots
 from .parks import Park
+from .entertainmentvenues import EntertainmentVenue
 from .entertainments import Entertainment
 from .attractions import Attraction
-from .ids import WDW_PARK_IDS, DLR_PARK_IDS, WDW_ID, DLR_ID, DESTINATION_IDS, themeparkapi_ids
+from .characters import Character
+from .ids import WDW_PARK_IDS, DLR_PARK_IDS, WDW_ID, DESTINATION_IDS, themeparkapi_ids
+from .entity import Entity, get_time_zone, get_associated_characters_url, get_associated_character_ids
 
 
-class Destination(object):
+class Destination(Entity):
+    __slots__ = ("__id", "__data", "__name", "__entityType", "__time_zone")
 
-    def __init__(self, id = None):
+    def __init__(self, id = None, lazy = False):
         """
         Constructor Function
         Allows access to various destination related data.
+        If lazy is True, only the id is stored and the data is downloaded the first time something needs it.
         """
+        self.__id = None if id is None else str(id)
+        self._loaded = False
+        self.__time_zone = get_time_zone(self.__id)
+
+        if not lazy:
+            self._load()
+
+    def _load(self, use_cache = True):
+        """Downloads the destination data and stores various elements into variables"""
+        id = self.__id
         error = True
-        self.__data = requests.get("https://api.wdpro.disney.go.com/facility-service/destinations/{}".format(id), headers=get_headers()).json()
+        self.__data = get_json("https://api.wdpro.disney.go.com/facility-service/destinations/{}".format(id), use_cache=use_cache)
         try:
             if self.__data['id'] is not None:
                 error = False
@@ -30,15 +51,7 @@ class Destination(object):
         self.__name = self.__data['name']
         self.__entityType = self.__data['type']
 
-        if self.__id == WDW_ID:
-            self.__time_zone = pytz.timezone('US/Eastern')
-        elif self.__id == DLR_ID:
-            self.__time_zone = pytz.timezone('US/Pacific')
-        else:
-            self.__time_zone = pytz.utc
-
-
-
+        self._loaded = True
 
     def get_possible_ids(self):
         """Returns a list of possible ids of this entityType"""
@@ -58,7 +71,7 @@ class Destination(object):
 
     def get_links(self):
         """Returns a dictionary of related links"""
-        return self.__data['links']
+        return deepcopy(self.__data['links'])
 
     def get_time_zone(self):
         """Returns pytz timezone object"""
@@ -66,16 +79,20 @@ class Destination(object):
 
     def get_raw_data(self):
         """Returns the raw data from global-facility-service"""
-        return self.__data
+        return deepcopy(self.__data)
 
 
     def get_attraction_ids(self):
         """
         Returns a list of Attraction IDs
         """
+        catalog = get_catalog(self.__id)
+        if catalog is not None and catalog.has_ids("attractions"):
+            return catalog.get_ids("attractions")
+
         attractions = []
 
-        data = requests.get(self.__data['links']['attractions']['href'], headers=get_headers()).json()
+        data = get_json(self.__data['links']['attractions']['href'])
 
         for attract in data['entries']:
             try:
@@ -88,9 +105,13 @@ class Destination(object):
         """
         Returns a list of Entertainment IDs
         """
+        catalog = get_catalog(self.__id)
+        if catalog is not None and catalog.has_ids("entertainments"):
+            return catalog.get_ids("entertainments")
+
         entertainments = []
 
-        data = requests.get(self.__data['links']['entertainments']['href'], headers=get_headers()).json()
+        data = get_json(self.__data['links']['entertainments']['href'])
 
         for enter in data['entries']:
             try:
@@ -99,13 +120,25 @@ class Destination(object):
                 pass
         return entertainments
 
+    def get_showtimes(self, start = "", end = None, max_workers = None):
+        """
+        Returns the performance times of every entertainment of the destination from start to end as a ShowTimes object
+        start, end = "YYYY-MM-DD", both included. If you don't pass them, it will get today's performance times
+        The schedules are downloaded at once using at most max_workers threads, see schedules.get_showtimes
+        """
+        return get_showtimes(self.get_entertainment_ids(), start, end, max_workers)
+
     def get_park_ids(self):
         """
         Returns a list of theme or water park IDs
         """
+        catalog = get_catalog(self.__id)
+        if catalog is not None and catalog.has_ids("parks"):
+            return catalog.get_ids("parks")
+
         ids = []
 
-        data = requests.get(self.__data['links']['themeParks']['href'], headers=get_headers()).json()
+        data = get_json(self.__data['links']['themeParks']['href'])
 
         for entry in data['entries']:
             try:
@@ -113,7 +146,7 @@ class Destination(object):
             except:
                 pass
 
-        data = requests.get(self.__data['links']['waterParks']['href'], headers=get_headers()).json()
+        data = get_json(self.__data['links']['waterParks']['href'])
         try:
             if data['errors'] is not None:
                 return ids
@@ -132,9 +165,13 @@ class Destination(object):
         """
         Returns a list of Entertainment Venue IDs
         """
+        catalog = get_catalog(self.__id)
+        if catalog is not None and catalog.has_ids("entertainment_venues"):
+            return catalog.get_ids("entertainment_venues")
+
         entertainments = []
 
-        data = requests.get(self.__data['links']['entertainmentVenues']['href'], headers=get_headers()).json()
+        data = get_json(self.__data['links']['entertainmentVenues']['href'])
 
         for enter in data['entries']:
             try:
@@ -143,13 +180,43 @@ class Destination(object):
                 pass
         return entertainments
 
+    def get_advisories(self, max_workers = None):
+        """
+        Gets the advisories of every park and entertainment venue of the destination and returns a list in the form of [{id, name, facilities}],
+        facilities being the ids of the parks and venues that list the advisory. Each advisory is downloaded once.
+        Returns a tuple (advisories, errors): errors are the parks, venues or advisories that couldn't be downloaded in the form of {id: exception}
+        """
+        parks, errors = Park.bulk(self.get_park_ids(), max_workers)
+        venues, venue_errors = EntertainmentVenue.bulk(self.get_entertainment_venue_ids(), max_workers)
+        errors.update(venue_errors)
+
+        entries = {}
+        facilities = {}
+        for facility in parks + venues:
+            for entry in facility.get_raw_data().get('advisories', []):
+                try:
+                    id = get_advisory_id(entry)
+                except (KeyError, TypeError, AttributeError):
+                    continue
+                entries.setdefault(id, entry)
+                facilities.setdefault(id, []).append(facility.get_id())
+
+        resolved, advisory_errors = map_concurrent(lambda id: (id, get_advisory(entries[id])), list(entries), max_workers)
+        errors.update(advisory_errors)
+
+        return [dict(advisory, facilities=facilities[id]) for id, advisory in resolved], errors
+
     def get_character_ids(self):
         """
         Returns a list of theme or water park IDs
         """
+        catalog = get_catalog(self.__id)
+        if catalog is not None and catalog.has_ids("characters"):
+            return catalog.get_ids("characters")
+
         ids = []
 
-        data = requests.get("https://api.wdpro.disney.go.com/facility-service/characters", headers=get_headers()).json()
+        data = get_json("https://api.wdpro.disney.go.com/facility-service/characters")
 
         for entry in data['entries']:
             try:
@@ -159,233 +226,179 @@ class Destination(object):
 
         return ids
 
-    def get_themeparkapi_data(self):
-        """Returns the list of dictionaries for all parks from the themeparks api"""
+    def get_attraction_characters(self, resolve = False, max_workers = None):
+        """
+        Gets the characters associated with every attraction of the destination in the form of {attraction id: [character ids]},
+        leaving out attractions without any. The associated-characters documents are downloaded at once.
+        If resolve is True the lists hold Character objects instead, each character is created once and shared between attractions.
+        Returns a tuple (characters, errors): errors are the attractions or characters that couldn't be downloaded in the form of {id: exception}
+        """
+        def fetch(id):
+            return id, get_associated_character_ids(get_json(get_associated_characters_url(id, "Attraction")))
+
+        results, errors = map_concurrent(fetch, self.get_attraction_ids(), max_workers)
+        characters = {id: ids for id, ids in results if len(ids) > 0}
+
+        if resolve:
+            unique = list(dict.fromkeys(character_id for ids in characters.values() for character_id in ids))
+            created, character_errors = map_concurrent(lambda id: (id, Character(id)), unique, max_workers)
+            errors.update(character_errors)
+            created = dict(created)
+            characters = {id: [created[i] for i in ids if i in created] for id, ids in characters.items()}
 
-        all_data = []
+        return characters, errors
 
-        if self.__id == WDW_ID:
+    def prefetch(self, max_workers = None):
+        """
+        Loads every park, attraction, entertainment, entertainment venue and character of the destination at once, using at most
+        max_workers threads, into a Catalog that is kept for the rest of the process (see mousetools.catalog).
+        Afterwards constructing any of those ids and listing the destination's ids makes no requests. Call it again to reload everything.
+        Returns the Catalog
+        """
+        forget(self.__id)
+        kinds = {
+            "parks": (self.get_park_ids, Park),
+            "attractions": (self.get_attraction_ids, Attraction),
+            "entertainments": (self.get_entertainment_ids, Entertainment),
+            "entertainment_venues": (self.get_entertainment_venue_ids, EntertainmentVenue),
+            "characters": (self.get_character_ids, Character),
+        }
+
+        listings, errors = map_concurrent(lambda kind: (kind, kinds[kind][0]()), list(kinds), max_workers)
+        ids = dict(listings)
+        items = [(kind, id) for kind, kind_ids in listings for id in kind_ids]
+
+        created, failed = map_concurrent(lambda item: (item[0], kinds[item[0]][1](item[1])), items, max_workers)
+        entities = {}
+        for kind, entity in created:
+            entities.setdefault(kind, []).append(entity)
+        errors.update({id: e for (kind, id), e in failed.items()})
+
+        catalog = Catalog(self, ids, entities, errors)
+        register(catalog)
+        return catalog
+
+    def get_spatial_index(self, cell_size = 250):
+        """
+        Returns a SpatialIndex of the guest entrance coordinates of every park, attraction, entertainment and entertainment venue
+        of the destination, for nearest and within radius queries. Uses the prefetched catalog, prefetching it first if needed.
+        Needs numpy, see mousetools.spatial
+        """
+        catalog = get_catalog(self.__id)
+        if catalog is None:
+            catalog = self.prefetch()
+        return SpatialIndex([entity for entity in catalog.get_entities() if hasattr(entity, "get_coordinates")], cell_size)
+
+    def get_wait_time_snapshot(self, max_age = None, timeout = None):
+        """
+        Returns one WaitTimeSnapshot combining the shared snapshots of every park of this destination.
+        The parks are downloaded concurrently, so this takes as long as the slowest park rather than all of them added up.
+        Parks that are not back within timeout seconds are left out, see WaitTimeSnapshot.get_statuses for which ones made it in.
+        Park snapshots are downloaded again once they are older than max_age seconds (default waittimes.default_max_age).
+        """
+        if str(self.__id) == WDW_ID:
             parks = WDW_PARK_IDS
         else:
             parks = DLR_PARK_IDS
 
-        for id in parks:
-            try:
-                park = themeparkapi_ids[id]
-                all_data.extend(requests.get(f"https://api.themeparks.wiki/preview/parks/{park}/waittime").json())
-            except:
-                continue
-
-        return all_data
-            
+        statuses = {id: "unavailable" for id in parks if id not in themeparkapi_ids}
+        slugs = {id: themeparkapi_ids[id] for id in parks if id in themeparkapi_ids}
 
-    def get_wait_times(self):
-        """Returns a list of dictionaries in the form of {rideid:time} for attractions and entertainments for this destination"""
-        data = self.get_themeparkapi_data()
+        snapshots, slug_statuses = get_snapshots(slugs.values(), max_age, timeout)
+        for id, slug in slugs.items():
+            statuses[id] = slug_statuses[slug]
 
-        times = {}
+        return WaitTimeSnapshot.combine([snapshots[slugs[id]] for id in parks if id in slugs and slugs[id] in snapshots], statuses)
 
-        for i in data:
-            id = i['id'].split("_")[-1]
-            try:
-                if i['meta']['type'] != "RESTAURANT":
-                    times[id] = i['waitTime']
-            except:
-                times[id] = i['waitTime']
+    def get_themeparkapi_data(self, max_age = None, timeout = None):
+        """Returns the list of dictionaries for all parks from the themeparks api"""
+        return self.get_wait_time_snapshot(max_age, timeout).get_raw_data()
 
-        return times
+    def get_wait_times(self, max_age = None, timeout = None):
+        """Returns a list of dictionaries in the form of {rideid:time} for attractions and entertainments for this destination"""
+        return self.get_wait_time_snapshot(max_age, timeout).get_wait_times()
 
-    def get_wait_times_detailed(self):
+    def get_wait_times_detailed(self, max_age = None, timeout = None):
         """Returns a list of dictionaries in the form of {rideid:{name, status, wait_time}} for attractions and entertainments for this destination"""
-        data = self.get_themeparkapi_data()
+        return self.get_wait_time_snapshot(max_age, timeout).get_wait_times_detailed(self.__time_zone)
 
-        times = {}
-
-        for i in data:
-            id = i['id'].split("_")[-1]
-            this = {}
-            try:
-                if i['meta']['type'] != "RESTAURANT":
-
-                    update_time = datetime.strptime(i['lastUpdate'], "%Y-%m-%dT%H:%M:%S.%fZ")
-                    update_time = update_time.replace(tzinfo=pytz.utc)
-                    update_time = update_time.astimezone(self.__time_zone)
-
-                    this['name'] = i['name']
-                    this['status'] = i['status']
-                    this['wait_time'] = i['waitTime']
-                    this['last_updated'] = update_time
-                    this['entityType'] = i['meta']['type'].capitalize()
-                    times[id] = this
-            except:
-                update_time = datetime.strptime(i['lastUpdate'], "%Y-%m-%dT%H:%M:%S.%fZ")
-                update_time = update_time.replace(tzinfo=pytz.utc)
-                update_time = update_time.astimezone(self.__time_zone)
-
-                this['name'] = i['name']
-                this['status'] = i['status']
-                this['wait_time'] = i['waitTime']
-                this['last_updated'] = update_time
-                this['entityType'] = "Entertainment"
-                times[id] = this
+    def get_attraction_wait_times(self, max_age = None, timeout = None):
+        """Returns a list of dictionaries in the form of {rideid:time} for attractions for this destination"""
+        return self.get_wait_time_snapshot(max_age, timeout).get_attraction_wait_times()
 
-        return times
+    def get_attraction_wait_times_detailed(self, max_age = None, timeout = None):
+        """Returns a list of dictionaries in the form of {rideid:{name, status, wait_time}} for attractions for this destination"""
+        return self.get_wait_time_snapshot(max_age, timeout).get_attraction_wait_times_detailed(self.__time_zone)
 
-    def get_attraction_wait_times(self):
-        """Returns a list of dictionaries in the form of {rideid:time} for attractions for this destination"""
-        data = self.get_themeparkapi_data()
+    def get_entertainment_wait_times(self, max_age = None, timeout = None):
+        """Returns a list of dictionaries in the form of {rideid:time} for entertainments for this destination"""
+        return self.get_wait_time_snapshot(max_age, timeout).get_entertainment_wait_times()
 
-        times = {}
+    def get_entertainment_wait_times_detailed(self, max_age = None, timeout = None):
+        """Returns a list of dictionaries in the form of {rideid:{name, status, wait_time}} for entertainments for this destination"""
+        return self.get_wait_time_snapshot(max_age, timeout).get_entertainment_wait_times_detailed(self.__time_zone)
 
-        for i in data:
-            id = i['id'].split("_")[-1]
-            try:
-                if i['meta']['type'] == "ATTRACTION":
-                    times[id] = i['waitTime']
-            except:
-                continue
+    def get_wait_times_columns(self, max_age = None, timeout = None, entity_type = None):
+        """
+        Returns the attractions and entertainments of every park of this destination as a dictionary of NumPy arrays {id, name, status, wait_time, last_updated, entityType}.
+        Use it instead of get_wait_times_detailed to build a DataFrame, see WaitTimeSnapshot.get_columns, to_pandas and to_arrow. Needs numpy
+        """
+        return self.get_wait_time_snapshot(max_age, timeout).get_columns(entity_type)
 
-        return times
+    def stream_wait_times(self, interval = 60, timeout = None):
+        """
+        Returns a WaitTimeStream that polls every park of this destination every interval seconds and yields only the entries that changed.
+        Each poll waits at most timeout seconds for the parks
+        """
+        if str(self.__id) == WDW_ID:
+            parks = WDW_PARK_IDS
+        else:
+            parks = DLR_PARK_IDS
 
-    def get_attraction_wait_times_detailed(self):
-        """Returns a list of dictionaries in the form of {rideid:{name, status, wait_time}} for attractions for this destination"""
-        data = self.get_themeparkapi_data()
+        return WaitTimeStream(parks, interval, self.__time_zone, timeout)
 
-        times = {}
+    def get_raw_calendar_data(self, date=""):
+        """
+        Returns raw calendar data on a date in the form of {date, schedules: {id: [entries]}, refurbishments, closed}. Date should be in the form yyyy-mm-dd
+        The calendar is built from the enabled local store, or a private one that other requests don't use if none is (see mousetools.store.get_store),
+        and synced for this destination if needed.
+        """
+        if date == "":
+            DATE = datetime.today()
+        else:
+            year, month, day = date.split('-')
+            DATE = datetime(int(year), int(month), int(day))
 
-        for i in data:
-            id = i['id'].split("_")[-1]
-            this = {}
-            try:
-                if i['meta']['type'] == "ATTRACTION":
-
-                    update_time = datetime.strptime(i['lastUpdate'], "%Y-%m-%dT%H:%M:%S.%fZ")
-                    update_time = update_time.replace(tzinfo=pytz.utc)
-                    update_time = update_time.astimezone(self.__time_zone)
-
-                    this['name'] = i['name']
-                    this['status'] = i['status']
-                    this['wait_time'] = i['waitTime']
-                    this['last_updated'] = update_time
-                    this['entityType'] = i['meta']['type'].capitalize()
-                    times[id] = this
-            except:
-                continue
+        STRDATE = "{}-{}-{}".format(DATE.year, self.__formatDate(str(DATE.month)), self.__formatDate(str(DATE.day)))
 
-        return times
+        local_store = store.get_store()
+        data = local_store.get_calendar(self.__id, STRDATE)
+        if data is None:
+            data = local_store.sync_calendar(self.__id, STRDATE)
 
-    def get_entertainment_wait_times(self):
-        """Returns a list of dictionaries in the form of {rideid:time} for entertainments for this destination"""
-        data = self.get_themeparkapi_data()
+        return data
 
-        times = {}
+    def get_refurbishments(self, date=""):
+        """
+        Returns a list of tuples in the form of (id, entityType) that are under refurbishment on a specified date
+        date = "YYYY-MM-DD"
+        """
+        data = self.get_raw_calendar_data(date)
+        if data is None:
+            return []
 
-        for i in data:
-            id = i['id'].split("_")[-1]
-            if 'type' not in i['meta'].keys():
-                    times[id] = i['waitTime']
+        return data['refurbishments']
 
-        return times
+    def get_closed(self, date=""):
+        """
+        Returns a list of tuples in the form of (id, entityType) that are closed on a specified date
+        date = "YYYY-MM-DD"
+        """
+        data = self.get_raw_calendar_data(date)
+        if data is None:
+            return []
 
-    def get_entertainment_wait_times_detailed(self):
-        """Returns a list of dictionaries in the form of {rideid:{name, status, wait_time}} for entertainments for this destination"""
-        data = self.get_themeparkapi_data()
-
-        times = {}
-
-        for i in data:
-            id = i['id'].split("_")[-1]
-            this = {}
-            if 'type' not in i['meta'].keys():
-                update_time = datetime.strptime(i['lastUpdate'], "%Y-%m-%dT%H:%M:%S.%fZ")
-                update_time = update_time.replace(tzinfo=pytz.utc)
-                update_time = update_time.astimezone(self.__time_zone)
-
-                this['name'] = i['name']
-                this['status'] = i['status']
-                this['wait_time'] = i['waitTime']
-                this['last_updated'] = update_time
-                this['entityType'] = "Entertainment"
-                times[id] = this
-
-        return times
-
-    
-    # Deprecated, remove or replace?
-    # Replace with all park hours
-    # def get_raw_calendar_data(self, date=""):
-    #     """
-    #     Returns raw calendar data on a date. Date should be in the form yyyy-mm-dd
-    #     """
-    #     if self.__db.channel_exists('{}.calendar.1_0'.format(self.__dest_code)):
-    #         self.__db.sync_calendar_channel()
-    #     else:
-    #         self.__db.create_calendar_channel('{}.calendar.1_0'.format(self.__dest_code))
-
-    #     conn = sqlite3.connect(self.__db.db_path)
-    #     c = conn.cursor()
-    #     data = c.execute("SELECT body FROM calendar WHERE date = ?", (date,)).fetchone()
-    #     conn.commit()
-    #     conn.close()
-
-    #     if data is None:
-    #         return None
-    #     else:
-    #         return json.loads(data[0])
-
-    # Can only get today's refurbishments now, will probably have to change this
-    # def get_refurbishments(self, date=""):
-    #     """
-    #     Returns a list of tuples in the form of (id, entityType) that are under refurbishment on a specified date
-    #     date = "YYY-MM-DD"
-    #     """
-    #     if date == "":
-    #         DATE = datetime.today()
-    #     else:
-    #         year, month, day = date.split('-')
-    #         DATE = datetime(int(year), int(month), int(day))
-
-    #     STRDATE = "{}-{}-{}".format(DATE.year, self.__formatDate(str(DATE.month)), self.__formatDate(str(DATE.day)))
-    #     date = self.get_raw_calendar_data(STRDATE)
-
-    #     ids = []
-    #     try:
-    #         for i in date['refurbishments']:
-    #             split = i['facilityId'].split(";")
-    #             id = split[0]
-    #             entityType = split[1].split("=")[-1]
-    #             ids.append((id, entityType))
-    #     except Exception as e:
-    #         print(e)
-
-    #     return ids
-
-    # Similar to refurbishments, can only get today's
-    # def get_closed(self, date=""):
-    #     """
-    #     Returns a list of tuples in the form of (id, entityType) that are under closed on a specified date
-    #     date = "YYY-MM-DD"
-    #     """
-    #     if date == "":
-    #         DATE = datetime.today()
-    #     else:
-    #         year, month, day = date.split('-')
-    #         DATE = datetime(int(year), int(month), int(day))
-
-    #     STRDATE = "{}-{}-{}".format(DATE.year, self.__formatDate(str(DATE.month)), self.__formatDate(str(DATE.day)))
-    #     date = self.get_raw_calendar_data(STRDATE)
-
-    #     ids = []
-    #     try:
-    #         for i in date['closed']:
-    #             split = i['facilityId'].split(";")
-    #             id = split[0]
-    #             entityType = split[1].split("=")[-1]
-    #             ids.append((id, entityType))
-    #     except Exception as e:
-    #         print(e)
-
-    #     return ids
+        return data['closed']
 
     def __formatDate(self, num):
         """
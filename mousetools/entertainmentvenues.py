@@ -1,20 +1,29 @@
-import requests
-import json
-import pytz
-from datetime import datetime, timedelta
-from .auth import get_headers
-from .ids import WDW_ID, DLR_ID
+from copy import deepcopy
+from .client import get_json
+from .workers import map_concurrent
+from .schedules import get_schedule, get_hours_range
+from .advisories import get_advisories
+from .entity import Entity, get_ancestor_ids, get_time_zone
 
-class EntertainmentVenue(object):
+class EntertainmentVenue(Entity):
+    __slots__ = ("__id", "__data", "__name", "__entityType", "__subType", "__anc_dest_id", "__anc_park_id", "__anc_resort_id", "__anc_land_id", "__anc_ra_id", "__anc_ev_id", "__time_zone")
 
-    def __init__(self, id = None):
+    def __init__(self, id = None, lazy = False):
         """
         Constructor Function
         Gets all venue data available and stores various elements into variables.
+        If lazy is True, only the id is stored and the data is downloaded the first time something needs it.
         """
-
+        self.__id = None if id is None else str(id)
+        self._loaded = False
+        if not lazy:
+            self._load()
+
+    def _load(self, use_cache = True):
+        """Downloads the entertainment venue data and stores various elements into variables"""
+        id = self.__id
         error = True
-        self.__data = requests.get("https://api.wdpro.disney.go.com/global-pool-override-B/facility-service/entertainment-venues/{}".format(id), headers=get_headers()).json()
+        self.__data = get_json("https://api.wdpro.disney.go.com/global-pool-override-B/facility-service/entertainment-venues/{}".format(id), use_cache=use_cache)
         try:
             if self.__data['id'] is not None:
                 error = False
@@ -28,75 +37,27 @@ class EntertainmentVenue(object):
         self.__id = id
         self.__name = self.__data['name']
         self.__entityType = self.__data['type']
-        try:
-            self.__subType = self.__data['subType']
-        except:
-            self.__subType = None
-        try:
-            self.__anc_dest_id = self.__data['ancestorDestination']['id'].split(';')[0]
-        except:
-            self.__anc_dest_id = None
-
-        try:
-            self.__anc_park_id = self.__data['links']['ancestorThemePark']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_park_id = self.__data['links']['ancestorWaterPark']['href'].split('/')[-1].split('?')[0]
-            except:
-                try:
-                    self.__anc_park_id = self.__data['ancestorThemeParkId'].split(';')[0]
-                except:
-                    try:
-                        self.__anc_park_id = self.__data['ancestorWaterParkId'].split(';')[0]
-                    except:
-                        self.__anc_park_id = None
-
-        try:
-            self.__anc_resort_id = self.__data['links']['ancestorResort']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_resort_id = self.__data['ancestorResortId'].split(';')[0]
-            except:
-                self.__anc_resort_id = None
-
-        try:
-            self.__anc_land_id = self.__data['links']['ancestorLand']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_land_id = self.__data['ancestorLandId'].split(';')[0]
-            except:
-                self.__anc_land_id = None
-
-        try:
-            self.__anc_ra_id = self.__data['links']['ancestorResortArea']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_ra_id = self.__data['ancestorResortAreaId'].split(';')[0]
-            except:
-                self.__anc_ra_id = None
-
-        try:
-            self.__anc_ev_id = self.__data['links']['ancestorEntertainmentVenue']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_ev_id = self.__data['ancestorEntertainmentVenueId'].split(';')[0]
-            except:
-                self.__anc_ev_id = None
+        self.__subType = self.__data.get('subType')
+        self.__anc_dest_id, self.__anc_park_id, self.__anc_resort_id, self.__anc_land_id, self.__anc_ra_id, self.__anc_ev_id = get_ancestor_ids(self.__data)
+        self.__time_zone = get_time_zone(self.__anc_dest_id)
 
-        if self.__anc_dest_id == WDW_ID:
-            self.__time_zone = pytz.timezone('US/Eastern')
-        elif self.__anc_dest_id == DLR_ID:
-            self.__time_zone = pytz.timezone('US/Pacific')
-        else:
-            self.__time_zone = pytz.utc
+        self._loaded = True
 
+    @classmethod
+    def bulk(cls, ids, max_workers = None):
+        """
+        Creates many EntertainmentVenue objects concurrently instead of one after another.
+        Returns a tuple (entertainment_venues, errors): the objects that could be created, in the same order as ids,
+        and the ids that failed in the form of {id: exception}
+        """
+        return map_concurrent(cls, ids, max_workers)
 
     def get_possible_ids(self):
         """Returns a list of possible ids of this entityType"""
         ids = []
 
-        dest_data = requests.get("https://api.wdpro.disney.go.com/facility-service/destinations/{}".format(self.__anc_dest_id), headers=get_headers()).json()
-        data = requests.get(dest_data['links']['entertainmentVenues']['href'], headers=get_headers()).json()
+        dest_data = get_json("https://api.wdpro.disney.go.com/facility-service/destinations/{}".format(self.__anc_dest_id))
+        data = get_json(dest_data['links']['entertainmentVenues']['href'])
 
         for entry in data['entries']:
             try:
@@ -148,7 +109,7 @@ class EntertainmentVenue(object):
 
     def get_links(self):
         """Returns a dictionary of related links"""
-        return self.__data['links']
+        return deepcopy(self.__data['links'])
 
     def get_time_zone(self):
         """Returns pytz timezone object"""
@@ -156,12 +117,12 @@ class EntertainmentVenue(object):
 
     def get_raw_data(self):
         """Returns the raw data from global-facility-service"""
-        return self.__data
+        return deepcopy(self.__data)
 
     def get_coordinates(self):
         """Returns the object's latitude and longitude"""
         try:
-            return self.__data['coordinates']['Guest Entrance']['gps']
+            return deepcopy(self.__data['coordinates']['Guest Entrance']['gps'])
         except:
             return None
 
@@ -179,7 +140,7 @@ class EntertainmentVenue(object):
         if facility_data is None:
             return None
         else:
-            return facility_data['media']
+            return deepcopy(facility_data['media'])
 
     def get_hours(self, date = ""):
         """
@@ -191,66 +152,22 @@ class EntertainmentVenue(object):
         If you don't pass a date, it will get today's hours
         """
 
-        if date == "":
-            DATE = datetime.today()
-        else:
-            year, month, day = date.split('-')
-            DATE = datetime(int(year), int(month), int(day))
-
-        s = requests.get("https://api.wdpro.disney.go.com/facility-service/schedules/{}?date={}-{}-{}".format(self.__id, DATE.year, self.__formatDate(str(DATE.month)), self.__formatDate(str(DATE.day))), headers=get_headers())
-        data = json.loads(s.content)
+        return get_schedule(self.__id, date).get_hours()
 
-        operating_hours_start = None
-        operating_hours_end = None
-        extra_hours_start = None
-        extra_hours_end = None
-
-        try:
-            for i in range(len(data['schedules'])):
-                if data['schedules'][i]['type'] == 'Operating':
-                    operating_hours_start = datetime(DATE.year, DATE.month, DATE.day, int(data['schedules'][i]['startTime'][0:2]), int(data['schedules'][i]['startTime'][3:5]))
-                    if int(data['schedules'][i]['endTime'][0:2]) >= 0 and int(data['schedules'][i]['endTime'][0:2]) <= 7:
-                        DATETEMP = DATE + timedelta(days=1)
-                        operating_hours_end = datetime(DATETEMP.year, DATETEMP.month, DATETEMP.day, int(data['schedules'][i]['endTime'][0:2]), int(data['schedules'][i]['endTime'][3:5]))
-                    else:
-                        operating_hours_end = datetime(DATE.year, DATE.month, DATE.day, int(data['schedules'][i]['endTime'][0:2]), int(data['schedules'][i]['endTime'][3:5]))
-
-                if data['schedules'][i]['type'] == "Special Ticketed Event":
-                    extra_hours_start = datetime(DATE.year, DATE.month, DATE.day, int(data['schedules'][i]['startTime'][0:2]), int(data['schedules'][i]['startTime'][3:5]))
-                    if int(data['schedules'][i]['endTime'][0:2]) >= 0 and int(data['schedules'][i]['endTime'][0:2]) <= 7:
-                        DATETEMP = DATE + timedelta(days=1)
-                        extra_hours_end = datetime(DATETEMP.year, DATETEMP.month, DATETEMP.day, int(data['schedules'][i]['endTime'][0:2]), int(data['schedules'][i]['endTime'][3:5]))
-                    else:
-                        operating_hours_end = datetime(DATE.year, DATE.month, DATE.day, int(data['schedules'][i]['endTime'][0:2]), int(data['schedules'][i]['endTime'][3:5]))
-
-        except KeyError:
-            pass
-        return operating_hours_start, operating_hours_end, extra_hours_start, extra_hours_end
-
-    def get_advisories(self):
+    def get_hours_range(self, start, end):
         """
-        Gets all the advisories for the venue and returns a list in the form of [{id, name}].
-        May take some time because it has to go to every link for each advisory.
+        Returns a dictionary of the object's hours for every date from start to end in the form of {"YYYY-MM-DD": (operating open, operating close, Extra Magic open, Extra Magic close)}
+        start, end = "YYYY-MM-DD", both included
+        Dates that weren't already downloaded are downloaded at once.
         """
+        return get_hours_range(self.__id, start, end)
 
-        advisories = []
-
-        for i in range(len(self.__data['advisories'])):
-            data = requests.get(self.__data['advisories'][i]['links']['self']['href'], headers=get_headers()).json()
-            this = {}
-            this['id'] = data['id']
-            this['name'] = data['name']
-            advisories.append(this)
-
-        return advisories
-
-    def __formatDate(self, num):
+    def get_advisories(self):
         """
-        Formats month and day into proper format
+        Gets all the advisories for the venue and returns a list in the form of [{id, name}].
+        The advisories are downloaded at once and shared with every other object that lists them, see mousetools.advisories
         """
-        if len(num) < 2:
-            num = '0'+num
-        return num
+        return get_advisories(self.__data['advisories'])
 
     def __eq__(self, other):
         """
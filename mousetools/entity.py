@@ -0,0 +1,162 @@
+"""
+entity module
+base class of the facility-service entities and the parsing they share
+"""
+import weakref
+import threading
+import pytz
+from .ids import WDW_ID, DLR_ID, WDW_PARK_IDS, DLR_PARK_IDS, themeparkapi_ids
+
+# (links, id fields) for each ancestor after the destination, in the order get_ancestor_ids returns them.
+# The first one a document has wins, links before id fields.
+ANCESTORS = (
+    (("ancestorThemePark", "ancestorWaterPark"), ("ancestorThemeParkId", "ancestorWaterParkId")),
+    (("ancestorResort",), ("ancestorResortId",)),
+    (("ancestorLand",), ("ancestorLandId",)),
+    (("ancestorResortArea",), ("ancestorResortAreaId",)),
+    (("ancestorEntertainmentVenue",), ("ancestorEntertainmentVenueId",)),
+)
+
+_EMPTY = {}
+
+_identity_lock = threading.Lock()
+
+
+def get_ancestor_ids(data):
+    """
+    Returns the ancestor ids of a facility-service document as a tuple (destination, park, resort, land, resort area, entertainment venue).
+    Ancestors the document doesn't have are None.
+    """
+    links = data.get('links')
+    if not isinstance(links, dict):
+        links = _EMPTY
+
+    destination = data.get('ancestorDestination')
+    destination = destination.get('id') if isinstance(destination, dict) else None
+    ids = [destination.split(';')[0] if isinstance(destination, str) else None]
+
+    for link_names, id_fields in ANCESTORS:
+        id = None
+        for name in link_names:
+            link = links.get(name)
+            href = link.get('href') if isinstance(link, dict) else None
+            if isinstance(href, str):
+                id = href.split('/')[-1].split('?')[0]
+                break
+        else:
+            for name in id_fields:
+                value = data.get(name)
+                if isinstance(value, str):
+                    id = value.split(';')[0]
+                    break
+        ids.append(id)
+
+    return tuple(ids)
+
+def get_associated_characters_url(id, entity_type):
+    """Returns the url of the associated-characters document of a facility"""
+    return "https://api.wdpro.disney.go.com/global-pool-override-B/facility-service/associated-characters/{};entityType={}".format(id, entity_type)
+
+def get_associated_character_ids(data):
+    """Returns the list of character ids of an associated-characters document"""
+    ids = []
+    for entry in data.get('entries', []):
+        try:
+            ids.append(entry['links']['self']['href'].split('/')[-1])
+        except (KeyError, TypeError, AttributeError):
+            pass
+    return ids
+
+def get_time_zone(destination_id):
+    """Returns the pytz timezone of a destination id, utc if it isn't a known destination"""
+    if str(destination_id) == WDW_ID:
+        return pytz.timezone('US/Eastern')
+    elif str(destination_id) == DLR_ID:
+        return pytz.timezone('US/Pacific')
+    else:
+        return pytz.utc
+
+def get_park_time_zone(park):
+    """
+    Returns the pytz timezone of a park id or themeparks api park name, utc if it isn't a known park.
+    Needs no request, so lazy objects use it instead of loading their data to learn their destination.
+    """
+    park = str(park)
+    for park_id, name in themeparkapi_ids.items():
+        if park == name:
+            park = park_id
+    if park in WDW_PARK_IDS:
+        return get_time_zone(WDW_ID)
+    elif park in DLR_PARK_IDS:
+        return get_time_zone(DLR_ID)
+    else:
+        return pytz.utc
+
+
+class EntityType(type):
+    """
+    Metaclass of Entity. Every class keeps a weak identity map of its instances by id, so constructing an id that already has
+    a live instance anywhere in the process returns that instance instead of downloading and parsing it again.
+    Instances are dropped from the map once nothing else references them.
+    """
+
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        cls._instances = weakref.WeakValueDictionary()
+
+    def __call__(cls, id = None, lazy = False):
+        if id is None:
+            return super().__call__(id, lazy)
+
+        key = str(id)
+        with _identity_lock:
+            instance = cls._instances.get(key)
+
+        if instance is None:
+            instance = super().__call__(id, lazy)
+            with _identity_lock:
+                # another thread may have created the same id in the meantime, keep the first one
+                instance = cls._instances.setdefault(key, instance)
+
+        if not lazy and not instance._loaded:
+            instance._load()
+        return instance
+
+    def get_instance(cls, id):
+        """Returns the live instance of id, None if there isn't one"""
+        with _identity_lock:
+            return cls._instances.get(str(id))
+
+    def forget(cls, id = None):
+        """Removes id, or every id if None, from the identity map so the next construction downloads it again"""
+        with _identity_lock:
+            if id is None:
+                cls._instances.clear()
+            else:
+                cls._instances.pop(str(id), None)
+
+
+class Entity(object, metaclass=EntityType):
+    """
+    Base class of Park, Attraction and the other entities. Subclasses list their own private attributes in __slots__,
+    so instances carry no __dict__, download and parse their data in _load and set _loaded once they have.
+    """
+    __slots__ = ("_loaded", "__weakref__")
+
+    def _load(self, use_cache = True):
+        raise NotImplementedError
+
+    def refresh(self):
+        """
+        Downloads and parses the object's data again, skipping the response cache and local store, and returns the object.
+        Every holder of the object sees the new data.
+        """
+        self._load(use_cache=False)
+        return self
+
+    def __getattr__(self, name):
+        # only called for attributes that are not set, which on a lazy object that has not loaded yet is all of its private data
+        if name != "_loaded" and name.startswith("_") and not name.startswith("__") and "__" in name and not self._loaded:
+            self._load()
+            return getattr(self, name)
+        raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
@@ -0,0 +1,179 @@
+"""
+history module
+recent wait times of every ride kept in NumPy ring buffers, needs numpy (pip install MouseTools[numpy])
+"""
+import time
+import threading
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('WaitTimeHistory needs numpy. Install it with: pip install MouseTools[numpy]')
+    return numpy
+
+
+class WaitTimeHistory(object):
+
+    def __init__(self, size = 288):
+        """
+        Constructor Function
+        Keeps the last size samples of every ride's wait time (288 is a day of 5 minute samples).
+        Samples share one timeline: each record() call is one column in a (rides x size) array that wraps around when full.
+        Rides that weren't in a sample, or had no wait time, are NaN for it.
+        Query results are NumPy arrays with one row per ride, in the order of get_ids().
+        """
+        np = _numpy()
+        self.size = size
+        self.__lock = threading.Lock()
+        self.__ids = []
+        self.__rows = {}
+        self.__values = np.full((64, size), np.nan)
+        self.__times = np.full(size, np.nan)
+        self.__count = 0
+
+    def record(self, wait_times, timestamp = None):
+        """
+        Adds a sample. wait_times = {rideid: time} as returned by Park.get_wait_times, or a WaitTimeSnapshot.
+        timestamp = unix time of the sample, default now
+        """
+        np = _numpy()
+        if hasattr(wait_times, "get_wait_times"):
+            wait_times = wait_times.get_wait_times()
+        if timestamp is None:
+            timestamp = time.time()
+
+        with self.__lock:
+            rows = []
+            for id in wait_times:
+                row = self.__rows.get(id)
+                if row is None:
+                    row = self.__add(id)
+                rows.append(row)
+
+            column = self.__count % self.size
+            self.__values[:, column] = np.nan
+            self.__values[rows, column] = np.array([np.nan if t is None else t for t in wait_times.values()], dtype=float)
+            self.__times[column] = timestamp
+            self.__count += 1
+
+    def get_ids(self):
+        """Returns the ride ids in the order of the rows of every query"""
+        with self.__lock:
+            return list(self.__ids)
+
+    def get_times(self, n = None):
+        """Returns the times of the last n samples (default all kept) as a datetime64 array, oldest first"""
+        np = _numpy()
+        with self.__lock:
+            times = np.concatenate([self.__times[columns] for columns in self.__window(n)])
+        return (times * 1e6).astype("datetime64[us]")
+
+    def get_last(self, n = None):
+        """Returns the last n samples (default all kept) of every ride as a (rides x n) array, oldest first"""
+        np = _numpy()
+        with self.__lock:
+            rows = len(self.__ids)
+            return np.concatenate([self.__values[:rows, columns] for columns in self.__window(n)], axis=1)
+
+    def get_latest(self):
+        """Returns the latest sample of every ride as an array"""
+        return self.get_last(1)[:, -1] if len(self) else _numpy().full(len(self.__ids), _numpy().nan)
+
+    def get_mean(self, n = None):
+        """Returns every ride's mean wait time over the last n samples (default all kept), ignoring missing samples"""
+        np = _numpy()
+        values = self.get_last(n)
+        counts = values.shape[1] - np.isnan(values).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.nan_to_num(values, copy=False).sum(axis=1) / counts
+
+    def get_min(self, n = None):
+        """Returns every ride's lowest wait time over the last n samples (default all kept), NaN if it has none"""
+        return self.__reduce(_numpy().fmin, n)
+
+    def get_max(self, n = None):
+        """Returns every ride's highest wait time over the last n samples (default all kept), NaN if it has none"""
+        return self.__reduce(_numpy().fmax, n)
+
+    def get_rolling_mean(self, window):
+        """
+        Returns the mean of every window consecutive samples of every ride, ignoring missing samples, as a (rides x samples - window + 1) array.
+        Column i ends at sample get_times()[window - 1 + i]. With fewer than window samples kept the array is (rides x 0).
+        Raises ValueError if window isn't a positive integer
+        """
+        np = _numpy()
+        if isinstance(window, bool) or not isinstance(window, (int, np.integer)) or window <= 0:
+            raise ValueError("window must be a positive integer")
+
+        values = self.get_last()
+        rows, samples = values.shape
+        if samples < window:
+            return np.empty((rows, 0))
+        valid = ~np.isnan(values)
+        np.nan_to_num(values, copy=False)
+
+        # running totals with a leading 0 column, so each window is the difference of two columns
+        sums = np.zeros((rows, samples + 1))
+        counts = np.zeros((rows, samples + 1))
+        np.cumsum(values, axis=1, out=sums[:, 1:])
+        np.cumsum(valid, axis=1, out=counts[:, 1:], dtype=float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return (sums[:, window:] - sums[:, :-window]) / (counts[:, window:] - counts[:, :-window])
+
+    def get_history(self, id, n = None):
+        """Returns a tuple (times, wait times) of the last n samples (default all kept) of one ride"""
+        np = _numpy()
+        with self.__lock:
+            row = self.__rows.get(str(id))
+        if row is None:
+            return self.get_times(0), np.array([])
+        return self.get_times(n), self.get_last(n)[row]
+
+    def clear(self):
+        """Forgets every sample and ride"""
+        np = _numpy()
+        with self.__lock:
+            self.__ids = []
+            self.__rows = {}
+            self.__values = np.full((64, self.size), np.nan)
+            self.__times = np.full(self.size, np.nan)
+            self.__count = 0
+
+    def __add(self, id):
+        """Gives a new ride a row, doubling the array when it is full. The caller must hold the lock"""
+        np = _numpy()
+        row = len(self.__ids)
+        if row == self.__values.shape[0]:
+            self.__values = np.concatenate([self.__values, np.full(self.__values.shape, np.nan)])
+        self.__ids.append(id)
+        self.__rows[id] = row
+        return row
+
+    def __window(self, n):
+        """Returns the last n columns, oldest first, as one or two slices of the ring. The caller must hold the lock"""
+        kept = min(self.__count, self.size)
+        n = kept if n is None else max(0, min(n, kept))
+        end = self.__count % self.size
+        if end - n >= 0:
+            return [slice(end - n, end)]
+        return [slice(self.size + end - n, self.size), slice(0, end)]
+
+    def __reduce(self, ufunc, n):
+        """Reduces the last n samples of every ride with a NaN ignoring ufunc (fmin, fmax) without copying them"""
+        np = _numpy()
+        with self.__lock:
+            rows = len(self.__ids)
+            result = np.full(rows, np.nan)
+            for columns in self.__window(n):
+                part = self.__values[:rows, columns]
+                if part.shape[1]:
+                    result = ufunc(result, ufunc.reduce(part, axis=1))
+        return result
+
+    def __len__(self):
+        return min(self.__count, self.size)
+
+    def __str__(self):
+        return 'WaitTimeHistory object with {} rides and {} samples'.format(len(self.__ids), len(self))
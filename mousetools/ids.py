@@ -1,6 +1,8 @@
-from .auth import get_headers
-import requests
+import os
 import json
+import time
+import threading
+from .client import get_json
 
 WDW_ID = '80007798'
 DLR_ID = '80008297'
@@ -21,11 +23,11 @@ themeparkapi_ids = {MK_ID: "WaltDisneyWorldMagicKingdom", EPCOT_ID: "WaltDisneyW
                     AK_ID: "WaltDisneyWorldAnimalKingdom", DLP_ID: "DisneylandResortMagicKingdom", CA_ID: "DisneylandResortCaliforniaAdventure"}
 
 
-def ids(dest, type):
-    dest_data = requests.get("https://api.wdpro.disney.go.com/facility-service/destinations/{}".format(dest), headers=get_headers()).json()
+def ids(dest, type, use_cache=True):
+    dest_data = get_json("https://api.wdpro.disney.go.com/facility-service/destinations/{}".format(dest), use_cache=use_cache)
     ids = []
 
-    data = requests.get(dest_data['links'][type]['href'], headers=get_headers()).json()
+    data = get_json(dest_data['links'][type]['href'], use_cache=use_cache)
 
     for enter in data['entries']:
         try:
@@ -34,11 +36,107 @@ def ids(dest, type):
             pass
     return ids
 
-WDW_EV_IDS = ids(WDW_ID, "entertainmentVenues")
-DLR_EV_IDS = ids(DLR_ID, "entertainmentVenues")
 
-WDW_ATTRACTION_IDS = ids(WDW_ID, "attractions")
-DLR_ATTRACTION_IDS = ids(DLR_ID, "attractions")
+# The id catalogs below are downloaded on first access instead of at import time and kept in a json file under CACHE_DIR.
+# Set CACHE_DIR to None to keep them in memory only.
+CACHE_DIR = os.environ.get("MOUSETOOLS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "mousetools"))
+CACHE_TTL = 24*60*60
 
-WDW_ENTERTAINMENT_IDS = ids(WDW_ID, "entertainments")
-DLR_ENTERTAINMENT_IDS = ids(DLR_ID, "entertainments")
+catalogs = {
+    "WDW_EV_IDS": (WDW_ID, "entertainmentVenues"),
+    "DLR_EV_IDS": (DLR_ID, "entertainmentVenues"),
+    "WDW_ATTRACTION_IDS": (WDW_ID, "attractions"),
+    "DLR_ATTRACTION_IDS": (DLR_ID, "attractions"),
+    "WDW_ENTERTAINMENT_IDS": (WDW_ID, "entertainments"),
+    "DLR_ENTERTAINMENT_IDS": (DLR_ID, "entertainments"),
+}
+
+_loaded = {}
+_lock = threading.Lock()
+
+
+def _cache_path():
+    return os.path.join(CACHE_DIR, "ids.json")
+
+def _read_cache():
+    if CACHE_DIR is None:
+        return {}
+    try:
+        with open(_cache_path()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_cache(entries):
+    if CACHE_DIR is None:
+        return
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        cache = _read_cache()
+        cache.update(entries)
+        tmp = "{}.{}.tmp".format(_cache_path(), os.getpid())
+        with open(tmp, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp, _cache_path())
+    except OSError:
+        pass
+
+def get_ids(name, max_age=None):
+    """
+    Returns the id catalog for name, e.g. "WDW_ATTRACTION_IDS".
+    Uses the in memory or disk cache if it is younger than max_age seconds (default CACHE_TTL), otherwise downloads it.
+    If the download fails, a stale cached catalog is returned instead when there is one.
+    """
+    if name not in catalogs:
+        raise ValueError('That id catalog is not available. name: {}. Available catalogs: {}'.format(name, ", ".join(catalogs)))
+
+    if max_age is None:
+        max_age = CACHE_TTL
+
+    with _lock:
+        entry = _loaded.get(name)
+        if entry is None:
+            entry = _read_cache().get(name)
+
+        if entry is not None and time.time() - entry['fetched'] < max_age:
+            _loaded[name] = entry
+            return entry['ids']
+
+        try:
+            return _download(name)
+        except Exception:
+            if entry is None:
+                raise
+            _loaded[name] = entry
+            return entry['ids']
+
+def _download(name):
+    entry = {'fetched': time.time(), 'ids': ids(*catalogs[name], use_cache=False)}
+    _loaded[name] = entry
+    _write_cache({name: entry})
+    return entry['ids']
+
+def refresh(names=None):
+    """
+    Downloads the given id catalogs, or all of them if names is None, and updates the cache.
+    Returns a dictionary in the form of {name: ids}
+    """
+    if names is None:
+        names = list(catalogs)
+
+    refreshed = {}
+    with _lock:
+        for name in names:
+            if name not in catalogs:
+                raise ValueError('That id catalog is not available. name: {}. Available catalogs: {}'.format(name, ", ".join(catalogs)))
+            refreshed[name] = _download(name)
+
+    return refreshed
+
+def __getattr__(name):
+    if name in catalogs:
+        return get_ids(name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+def __dir__():
+    return sorted(list(globals()) + list(catalogs))
@@ -0,0 +1,168 @@
+"""
+metrics module
+counts, latencies and sizes of every HTTP request the library makes, grouped by endpoint
+"""
+import re
+import sys
+import threading
+
+# Upper bounds in seconds of the latency histogram buckets, the same defaults Prometheus client libraries use
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# [url pattern, replacement] applied in order to turn a url into its endpoint template
+TEMPLATES = [
+    [re.compile(r"^\w+://"), ""],
+    [re.compile(r"[?#].*$"), ""],
+    [re.compile(r"/preview/parks/[^/]+/"), "/preview/parks/{park}/"],
+    [re.compile(r";entityType=[^/;]+"), ";entityType={type}"],
+    [re.compile(r"/\d+(?=[/;]|$)"), "/{id}"],
+]
+
+# Modules whose frames are skipped when looking for the function that made a request
+_plumbing = ("mousetools.client", "mousetools.transport", "mousetools.metrics")
+
+
+def get_endpoint(url):
+    """Returns the endpoint template of url, e.g. api.wdpro.disney.go.com/facility-service/schedules/{id}"""
+    for pattern, replacement in TEMPLATES:
+        url = pattern.sub(replacement, url)
+    return url
+
+def get_caller(depth = 2):
+    """Returns "module.function" of the first function outside the client that is on the stack depth frames up"""
+    frame = sys._getframe(depth)
+    while frame is not None and frame.f_globals.get('__name__') in _plumbing:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+
+    code = frame.f_code
+    return "{}.{}".format(frame.f_globals.get('__name__'), getattr(code, 'co_qualname', code.co_name))
+
+
+class MetricsRegistry(object):
+
+    def __init__(self, buckets = DEFAULT_BUCKETS):
+        """
+        Constructor Function
+        Collects per endpoint request counts by status, errors, response bytes and a latency histogram with the given bucket bounds,
+        plus request counts per calling function and token refreshes.
+        """
+        self.enabled = True
+        self.buckets = tuple(sorted(buckets))
+        self.__lock = threading.Lock()
+        self.__endpoints = {}
+        self.__callers = {}
+        self.__token_refreshes = {'ok': 0, 'error': 0}
+
+    def record(self, url, status_code, seconds, size, caller = None):
+        """
+        Records one request. status_code is None if no response arrived (e.g. a timeout), size is the response body in bytes.
+        Responses with a status of 400 or more and missing responses count as errors.
+        """
+        if not self.enabled:
+            return
+
+        endpoint = get_endpoint(url)
+        status = str(status_code) if status_code is not None else "exception"
+        with self.__lock:
+            stats = self.__endpoints.get(endpoint)
+            if stats is None:
+                stats = {'requests': 0, 'errors': 0, 'statuses': {}, 'bytes': 0, 'seconds': 0.0, 'buckets': [0] * len(self.buckets)}
+                self.__endpoints[endpoint] = stats
+
+            stats['requests'] += 1
+            stats['statuses'][status] = stats['statuses'].get(status, 0) + 1
+            stats['bytes'] += size
+            stats['seconds'] += seconds
+            if status_code is None or status_code >= 400:
+                stats['errors'] += 1
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    stats['buckets'][i] += 1
+                    break
+
+            if caller is not None:
+                self.__callers[caller] = self.__callers.get(caller, 0) + 1
+
+    def record_token_refresh(self, ok = True):
+        """Records one attempt to get a new access token"""
+        if not self.enabled:
+            return
+
+        with self.__lock:
+            self.__token_refreshes['ok' if ok else 'error'] += 1
+
+    def snapshot(self):
+        """
+        Returns a copy of everything recorded in the form of
+        {endpoints: {endpoint: {requests, errors, statuses: {status: count}, bytes, seconds, buckets: [(bound, cumulative count)]}},
+        callers: {function: requests}, token_refreshes: {ok, error}}
+        """
+        with self.__lock:
+            endpoints = {}
+            for endpoint, stats in self.__endpoints.items():
+                cumulative = []
+                count = 0
+                for bound, n in zip(self.buckets, stats['buckets']):
+                    count += n
+                    cumulative.append((bound, count))
+                cumulative.append((float("inf"), stats['requests']))
+                endpoints[endpoint] = dict(stats, statuses=dict(stats['statuses']), buckets=cumulative)
+
+            return {'endpoints': endpoints, 'callers': dict(self.__callers), 'token_refreshes': dict(self.__token_refreshes)}
+
+    def reset(self):
+        """Forgets everything recorded"""
+        with self.__lock:
+            self.__endpoints.clear()
+            self.__callers.clear()
+            self.__token_refreshes = {'ok': 0, 'error': 0}
+
+    def to_prometheus(self, prefix = "mousetools"):
+        """Returns the metrics in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        endpoints = sorted(snapshot['endpoints'].items())
+        lines = []
+
+        def family(name, type, help):
+            lines.append("# HELP {}_{} {}".format(prefix, name, help))
+            lines.append("# TYPE {}_{} {}".format(prefix, name, type))
+
+        family("requests_total", "counter", "HTTP requests made, by endpoint and status code.")
+        for endpoint, stats in endpoints:
+            for status, count in sorted(stats['statuses'].items()):
+                lines.append('{}_requests_total{{endpoint="{}",status="{}"}} {}'.format(prefix, _escape(endpoint), status, count))
+
+        family("request_errors_total", "counter", "HTTP requests that failed or got a status of 400 or more, by endpoint.")
+        for endpoint, stats in endpoints:
+            lines.append('{}_request_errors_total{{endpoint="{}"}} {}'.format(prefix, _escape(endpoint), stats['errors']))
+
+        family("response_bytes_total", "counter", "Response body bytes received, by endpoint.")
+        for endpoint, stats in endpoints:
+            lines.append('{}_response_bytes_total{{endpoint="{}"}} {}'.format(prefix, _escape(endpoint), stats['bytes']))
+
+        family("request_duration_seconds", "histogram", "HTTP request latency in seconds, by endpoint.")
+        for endpoint, stats in endpoints:
+            for bound, count in stats['buckets']:
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                lines.append('{}_request_duration_seconds_bucket{{endpoint="{}",le="{}"}} {}'.format(prefix, _escape(endpoint), le, count))
+            lines.append('{}_request_duration_seconds_sum{{endpoint="{}"}} {}'.format(prefix, _escape(endpoint), repr(stats['seconds'])))
+            lines.append('{}_request_duration_seconds_count{{endpoint="{}"}} {}'.format(prefix, _escape(endpoint), stats['requests']))
+
+        family("caller_requests_total", "counter", "HTTP requests made, by the library function that made them.")
+        for caller, count in sorted(snapshot['callers'].items()):
+            lines.append('{}_caller_requests_total{{caller="{}"}} {}'.format(prefix, _escape(caller), count))
+
+        family("token_refreshes_total", "counter", "Attempts to get a new Disney access token, by result.")
+        for result, count in sorted(snapshot['token_refreshes'].items()):
+            lines.append('{}_token_refreshes_total{{result="{}"}} {}'.format(prefix, result, count))
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
@@ -1,26 +1,37 @@
-import requests
-import json
-import pytz
-from datetime import datetime, timedelta
-from .auth import get_headers
-from .ids import themeparkapi_ids, WDW_ID, DLR_ID
+from copy import deepcopy
+from .client import get_json
+from .workers import map_concurrent
+from .schedules import get_schedule, get_hours_range
+from .advisories import get_advisories
+from .waittimes import get_snapshot, WaitTimeStream
+from .ids import themeparkapi_ids
+from .entity import Entity, get_ancestor_ids, get_time_zone, get_park_time_zone
 
 
-class Park(object):
+class Park(Entity):
+    __slots__ = ("__id", "__data", "__name", "__entityType", "__subType", "__anc_dest_id", "__anc_park_id", "__anc_resort_id", "__anc_land_id", "__anc_ra_id", "__anc_ev_id", "__time_zone")
 
-    def __init__(self, id = None):
+    def __init__(self, id = None, lazy = False):
         """
         Constructor Function
         Gets all park data available and stores various elements into variables.
+        If lazy is True, only the id is stored and the data is downloaded the first time something needs it.
         """
-
+        self.__id = None if id is None else str(id)
+        self._loaded = False
+        if not lazy:
+            self._load()
+
+    def _load(self, use_cache = True):
+        """Downloads the park data and stores various elements into variables"""
+        id = self.__id
         error = True
-        self.__data = requests.get("https://api.wdpro.disney.go.com/global-pool-override-B/facility-service/theme-parks/{}".format(id), headers=get_headers()).json()
+        self.__data = get_json("https://api.wdpro.disney.go.com/global-pool-override-B/facility-service/theme-parks/{}".format(id), use_cache=use_cache)
         try:
             if self.__data['id'] is not None:
                 error = False
         except:
-            self.__data = requests.get("https://api.wdpro.disney.go.com/global-pool-override-B/facility-service/water-parks/{}".format(id), headers=get_headers()).json()
+            self.__data = get_json("https://api.wdpro.disney.go.com/global-pool-override-B/facility-service/water-parks/{}".format(id), use_cache=use_cache)
             try:
                 if self.__data['id'] is not None:
                     error = False
@@ -35,77 +46,27 @@ class Park(object):
         self.__id = id
         self.__name = self.__data['name']
         self.__entityType = self.__data['type']
-        try:
-            self.__subType = self.__data['subType']
-        except:
-            self.__subType = None
-
-        try:
-            self.__anc_dest_id = self.__data['ancestorDestination']['id'].split(';')[0]
-        except:
-            self.__anc_dest_id = None
-
-        try:
-            self.__anc_park_id = self.__data['links']['ancestorThemePark']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_park_id = self.__data['links']['ancestorWaterPark']['href'].split('/')[-1].split('?')[0]
-            except:
-                try:
-                    self.__anc_park_id = self.__data['ancestorThemeParkId'].split(';')[0]
-                except:
-                    try:
-                        self.__anc_park_id = self.__data['ancestorWaterParkId'].split(';')[0]
-                    except:
-                        self.__anc_park_id = None
-
-        try:
-            self.__anc_resort_id = self.__data['links']['ancestorResort']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_resort_id = self.__data['ancestorResortId'].split(';')[0]
-            except:
-                self.__anc_resort_id = None
-
-        try:
-            self.__anc_land_id = self.__data['links']['ancestorLand']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_land_id = self.__data['ancestorLandId'].split(';')[0]
-            except:
-                self.__anc_land_id = None
+        self.__subType = self.__data.get('subType')
+        self.__anc_dest_id, self.__anc_park_id, self.__anc_resort_id, self.__anc_land_id, self.__anc_ra_id, self.__anc_ev_id = get_ancestor_ids(self.__data)
+        self.__time_zone = get_time_zone(self.__anc_dest_id)
 
-        try:
-            self.__anc_ra_id = self.__data['links']['ancestorResortArea']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_ra_id = self.__data['ancestorResortAreaId'].split(';')[0]
-            except:
-                self.__anc_ra_id = None
-
-        try:
-            self.__anc_ev_id = self.__data['links']['ancestorEntertainmentVenue']['href'].split('/')[-1].split('?')[0]
-        except:
-            try:
-                self.__anc_ev_id = self.__data['ancestorEntertainmentVenueId'].split(';')[0]
-            except:
-                self.__anc_ev_id = None
-
-        
-        if self.__anc_dest_id == WDW_ID:
-            self.__time_zone = pytz.timezone('US/Eastern')
-        elif self.__anc_dest_id == DLR_ID:
-            self.__time_zone = pytz.timezone('US/Pacific')
-        else:
-            self.__time_zone = pytz.utc
+        self._loaded = True
 
+    @classmethod
+    def bulk(cls, ids, max_workers = None):
+        """
+        Creates many Park objects concurrently instead of one after another.
+        Returns a tuple (parks, errors): the objects that could be created, in the same order as ids,
+        and the ids that failed in the form of {id: exception}
+        """
+        return map_concurrent(cls, ids, max_workers)
 
     def get_possible_ids(self):
         """Returns a list of possible ids of this entityType"""
         ids = []
 
-        dest_data = requests.get("https://api.wdpro.disney.go.com/facility-service/destinations/{}".format(self.__anc_dest_id), headers=get_headers()).json()
-        data = requests.get(dest_data['links']['themeParks']['href'], headers=get_headers()).json()
+        dest_data = get_json("https://api.wdpro.disney.go.com/facility-service/destinations/{}".format(self.__anc_dest_id))
+        data = get_json(dest_data['links']['themeParks']['href'])
 
         for entry in data['entries']:
             try:
@@ -113,7 +74,7 @@ class Park(object):
             except:
                 pass
 
-        data = requests.get(dest_data['links']['waterParks']['href'], headers=get_headers()).json()
+        data = get_json(dest_data['links']['waterParks']['href'])
         try:
             for entry in data['entries']:
                 try:
@@ -167,7 +128,7 @@ class Park(object):
 
     def get_links(self):
         """Returns a dictionary of related links"""
-        return self.__data['links']
+        return deepcopy(self.__data['links'])
 
     def get_time_zone(self):
         """Returns pytz timezone object"""
@@ -175,157 +136,76 @@ class Park(object):
 
     def get_raw_data(self):
         """Returns the raw data from global-facility-service"""
-        return self.__data
+        return deepcopy(self.__data)
+
+    def get_wait_time_snapshot(self, max_age = None):
+        """
+        Returns the WaitTimeSnapshot of this park that every wait time method reads from.
+        It is shared by the whole process and downloaded again once it is older than max_age seconds (default waittimes.default_max_age).
+        """
+        if not self._loaded:
+            # a lazy park doesn't need its data for this, its own id is enough
+            return get_snapshot(themeparkapi_ids[str(self.__id)], max_age)
+        return get_snapshot(themeparkapi_ids[self.__anc_park_id], max_age)
 
-    def get_themeparkapi_data(self):
+    def get_themeparkapi_data(self, max_age = None):
         """Returns the list of dictionaries from the themepark api for the given id"""
-        park = themeparkapi_ids[self.__anc_park_id]
-        all_data = requests.get(f"https://api.themeparks.wiki/preview/parks/{park}/waittime").json()
-        return all_data
+        return self.get_wait_time_snapshot(max_age).get_raw_data()
 
-    def get_wait_times(self):
+    def get_wait_times(self, max_age = None):
         """Returns a list of dictionaries in the form of {rideid:time} for attractions and entertainments for this park"""
-        data = self.get_themeparkapi_data()
-
-        times = {}
-
-        for i in data:
-            id = i['id'].split("_")[-1]
-            try:
-                if i['meta']['type'] != "RESTAURANT":
-                    times[id] = i['waitTime']
-            except:
-                times[id] = i['waitTime']
-
-        return times
+        return self.get_wait_time_snapshot(max_age).get_wait_times()
 
-    def get_wait_times_detailed(self):
+    def get_wait_times_detailed(self, max_age = None):
         """Returns a list of dictionaries in the form of {rideid:{name, status, wait_time}} for attractions and entertainments for this park"""
-        data = self.get_themeparkapi_data()
-
-        times = {}
-
-        for i in data:
-            id = i['id'].split("_")[-1]
-            this = {}
-            try:
-                if i['meta']['type'] != "RESTAURANT":
-
-                    update_time = datetime.strptime(i['lastUpdate'], "%Y-%m-%dT%H:%M:%S.%fZ")
-                    update_time = update_time.replace(tzinfo=pytz.utc)
-                    update_time = update_time.astimezone(self.__time_zone)
-
-                    this['name'] = i['name']
-                    this['status'] = i['status']
-                    this['wait_time'] = i['waitTime']
-                    this['last_updated'] = update_time
-                    this['entityType'] = i['meta']['type'].capitalize()
-                    times[id] = this
-            except:
+        return self.get_wait_time_snapshot(max_age).get_wait_times_detailed(self.__get_wait_time_zone())
 
-                update_time = datetime.strptime(i['lastUpdate'], "%Y-%m-%dT%H:%M:%S.%fZ")
-                update_time = update_time.replace(tzinfo=pytz.utc)
-                update_time = update_time.astimezone(self.__time_zone)
-
-                this['name'] = i['name']
-                this['status'] = i['status']
-                this['wait_time'] = i['waitTime']
-                this['last_updated'] = update_time
-                this['entityType'] = "Entertainment"
-                times[id] = this
-
-        return times
-
-    def get_attraction_wait_times(self):
+    def get_attraction_wait_times(self, max_age = None):
         """Returns a list of dictionaries in the form of {rideid:time} for attractions for this park"""
-        data = self.get_themeparkapi_data()
+        return self.get_wait_time_snapshot(max_age).get_attraction_wait_times()
 
-        times = {}
-
-        for i in data:
-            id = i['id'].split("_")[-1]
-            try:
-                if i['meta']['type'] == "ATTRACTION":
-                    times[id] = i['waitTime']
-            except:
-                continue
-
-        return times
-
-    def get_attraction_wait_times_detailed(self):
+    def get_attraction_wait_times_detailed(self, max_age = None):
         """Returns a list of dictionaries in the form of {rideid:{name, status, wait_time}} for attractions for this park"""
-        data = self.get_themeparkapi_data()
-
-        times = {}
-
-        for i in data:
-            id = i['id'].split("_")[-1]
-            this = {}
-            try:
-                if i['meta']['type'] == "ATTRACTION":
-
-                    update_time = datetime.strptime(i['lastUpdate'], "%Y-%m-%dT%H:%M:%S.%fZ")
-                    update_time = update_time.replace(tzinfo=pytz.utc)
-                    update_time = update_time.astimezone(self.__time_zone)
-
-                    this['name'] = i['name']
-                    this['status'] = i['status']
-                    this['wait_time'] = i['waitTime']
-                    this['last_updated'] = update_time
-                    this['entityType'] = i['meta']['type'].capitalize()
-                    times[id] = this
-            except:
-                continue
-
-        return times
+        return self.get_wait_time_snapshot(max_age).get_attraction_wait_times_detailed(self.__get_wait_time_zone())
 
-    def get_entertainment_wait_times(self):
+    def get_entertainment_wait_times(self, max_age = None):
         """Returns a list of dictionaries in the form of {rideid:time} for entertainments for this park"""
-        data = self.get_themeparkapi_data()
-
-        times = {}
-
-        for i in data:
-            id = i['id'].split("_")[-1]
-            if 'type' not in i['meta'].keys():
-                    times[id] = i['waitTime']
+        return self.get_wait_time_snapshot(max_age).get_entertainment_wait_times()
 
-        return times
-
-    def get_entertainment_wait_times_detailed(self):
+    def get_entertainment_wait_times_detailed(self, max_age = None):
         """Returns a list of dictionaries in the form of {rideid:{name, status, wait_time}} for entertainments for this park"""
-        data = self.get_themeparkapi_data()
-
-        times = {}
-
-        for i in data:
-            id = i['id'].split("_")[-1]
-            this = {}
-            if 'type' not in i['meta'].keys():
+        return self.get_wait_time_snapshot(max_age).get_entertainment_wait_times_detailed(self.__get_wait_time_zone())
 
-                update_time = datetime.strptime(i['lastUpdate'], "%Y-%m-%dT%H:%M:%S.%fZ")
-                update_time = update_time.replace(tzinfo=pytz.utc)
-                update_time = update_time.astimezone(self.__time_zone)
+    def get_wait_times_columns(self, max_age = None, entity_type = None):
+        """
+        Returns this park's attractions and entertainments as a dictionary of NumPy arrays {id, name, status, wait_time, last_updated, entityType}.
+        Use it instead of get_wait_times_detailed to build a DataFrame, see WaitTimeSnapshot.get_columns, to_pandas and to_arrow. Needs numpy
+        """
+        return self.get_wait_time_snapshot(max_age).get_columns(entity_type)
 
-                this['name'] = i['name']
-                this['status'] = i['status']
-                this['wait_time'] = i['waitTime']
-                this['last_updated'] = update_time
-                this['entityType'] = "Entertainment"
-                times[id] = this
+    def stream_wait_times(self, interval = 60):
+        """
+        Returns a WaitTimeStream that polls this park every interval seconds and yields only the entries that changed, e.g.
+        for changes in park.stream_wait_times(30): ...
+        """
+        return WaitTimeStream([self.__id if not self._loaded else self.__anc_park_id], interval, self.__get_wait_time_zone())
 
-        return times
+    def __get_wait_time_zone(self):
+        """Returns the time zone of the wait times, from the park id alone on a lazy park so its data isn't downloaded"""
+        if not self._loaded:
+            return get_park_time_zone(self.__id)
+        return self.__time_zone
 
     # Figure out how to get the current status
     # def get_status(self):
     #     """Return current status of the object."""
     #     park = themeparkapi_ids[self.__anc_park_id]
-    #     all_data = requests.get(f"https://api.themeparks.wiki/preview/parks/{park}/calendar").json()
+    #     all_data = get_json(f"https://api.themeparks.wiki/preview/parks/{park}/calendar", authenticated=False)
 
     def get_coordinates(self):
         """Returns the object's latitude and longitude"""
         try:
-            return self.__data['coordinates']['Guest Entrance']['gps']
+            return deepcopy(self.__data['coordinates']['Guest Entrance']['gps'])
         except:
             return None
 
@@ -343,7 +223,7 @@ class Park(object):
         if facility_data is None:
             return None
         else:
-            return facility_data['media']
+            return deepcopy(facility_data['media'])
 
     def admission_required(self):
         """Returns boolean of admission required"""
@@ -359,64 +239,28 @@ class Park(object):
         If you don't pass a date, it will get today's hours
         """
 
-        if date == "":
-            DATE = datetime.today()
-        else:
-            year, month, day = date.split('-')
-            DATE = datetime(int(year), int(month), int(day))
-
-        s = requests.get("https://api.wdpro.disney.go.com/facility-service/schedules/{}?date={}-{}-{}".format(self.__id, DATE.year, self.__formatDate(str(DATE.month)), self.__formatDate(str(DATE.day))), headers=get_headers())
-        data = json.loads(s.content)
-
-        operating_hours_start = None
-        operating_hours_end = None
-        extra_hours_start = None
-        extra_hours_end = None
+        return get_schedule(self.__id, date).get_hours()
 
-        try:
-            for i in range(len(data['schedules'])):
-                if data['schedules'][i]['type'] == 'Operating':
-                    operating_hours_start = datetime(DATE.year, DATE.month, DATE.day, int(data['schedules'][i]['startTime'][0:2]), int(data['schedules'][i]['startTime'][3:5]))
-                    if int(data['schedules'][i]['endTime'][0:2]) >= 0 and int(data['schedules'][i]['endTime'][0:2]) <= 7:
-                        DATETEMP = DATE + timedelta(days=1)
-                        operating_hours_end = datetime(DATETEMP.year, DATETEMP.month, DATETEMP.day, int(data['schedules'][i]['endTime'][0:2]), int(data['schedules'][i]['endTime'][3:5]))
-                    else:
-                        operating_hours_end = datetime(DATE.year, DATE.month, DATE.day, int(data['schedules'][i]['endTime'][0:2]), int(data['schedules'][i]['endTime'][3:5]))
-
-                if data['schedules'][i]['type'] == "Special Ticketed Event":
-                    extra_hours_start = datetime(DATE.year, DATE.month, DATE.day, int(data['schedules'][i]['startTime'][0:2]), int(data['schedules'][i]['startTime'][3:5]))
-                    if int(data['schedules'][i]['endTime'][0:2]) >= 0 and int(data['schedules'][i]['endTime'][0:2]) <= 7:
-                        DATETEMP = DATE + timedelta(days=1)
-                        extra_hours_end = datetime(DATETEMP.year, DATETEMP.month, DATETEMP.day, int(data['schedules'][i]['endTime'][0:2]), int(data['schedules'][i]['endTime'][3:5]))
-                    else:
-                        operating_hours_end = datetime(DATE.year, DATE.month, DATE.day, int(data['schedules'][i]['endTime'][0:2]), int(data['schedules'][i]['endTime'][3:5]))
-
-        except KeyError:
-            pass
-        return operating_hours_start, operating_hours_end, extra_hours_start, extra_hours_end
+    def get_hours_range(self, start, end):
+        """
+        Returns a dictionary of the object's hours for every date from start to end in the form of {"YYYY-MM-DD": (operating open, operating close, Extra Magic open, Extra Magic close)}
+        start, end = "YYYY-MM-DD", both included
+        Dates that weren't already downloaded are downloaded at once.
+        """
+        return get_hours_range(self.__id, start, end)
 
     def get_advisories(self):
         """
         Gets all the advisories for the park and returns a list in the form of [{id, name}].
-        May take some time because it has to go to every link for each advisory.
+        The advisories are downloaded at once and shared with every other object that lists them, see mousetools.advisories
         """
-
-        advisories = []
-
-        for i in range(len(self.__data['advisories'])):
-            data = requests.get(self.__data['advisories'][i]['links']['self']['href'], headers=get_headers()).json()
-            this = {}
-            this['id'] = data['id']
-            this['name'] = data['name']
-            advisories.append(this)
-
-        return advisories
+        return get_advisories(self.__data['advisories'])
 
     def get_entertainment_ids(self):
         """Returns a list of entertainments for this object"""
         ids = []
 
-        data = requests.get("https://api.wdpro.disney.go.com/facility-service/{}s/{}/entertainments?region=us".format(self.__entityType, self.__id), headers=get_headers()).json()
+        data = get_json("https://api.wdpro.disney.go.com/facility-service/{}s/{}/entertainments?region=us".format(self.__entityType, self.__id))
 
         for entry in data['entries']:
             try:
@@ -426,14 +270,6 @@ class Park(object):
 
         return ids
 
-    def __formatDate(self, num):
-        """
-        Formats month and day into proper format
-        """
-        if len(num) < 2:
-            num = '0'+num
-        return num
-
     def __eq__(self, other):
         """
         Checks if objects are equal
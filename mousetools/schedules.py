@@ -0,0 +1,266 @@
+"""
+schedules module
+facility-service schedules, downloaded and parsed once per (id, date) and shared by get_hours, get_schedule and the range queries
+"""
+from copy import deepcopy
+from array import array
+from bisect import bisect_left
+from datetime import datetime, date as Date, timedelta
+from .client import get_json
+from .cache import ResponseCache
+from .workers import map_concurrent
+
+# Parsed schedules by url, so every (id, date) pair is its own entry. Entries are kept as long as the "schedule" cache policy says
+schedule_cache = ResponseCache(maxsize=4096)
+
+
+def format_date(date = ""):
+    """Returns date as a "yyyy-mm-dd" string. date can be "yyyy-mm-dd", a date or a datetime, "" is today"""
+    if date == "" or date is None:
+        date = datetime.today()
+    elif isinstance(date, str):
+        year, month, day = date.split('-')
+        date = Date(int(year), int(month), int(day))
+    return "{:04d}-{:02d}-{:02d}".format(date.year, date.month, date.day)
+
+def get_dates(start, end):
+    """Returns every "yyyy-mm-dd" from start to end, both included"""
+    first = datetime.strptime(format_date(start), "%Y-%m-%d")
+    last = datetime.strptime(format_date(end), "%Y-%m-%d")
+    return [(first + timedelta(days=i)).strftime("%Y-%m-%d") for i in range((last - first).days + 1)]
+
+def get_url(id, date):
+    return "https://api.wdpro.disney.go.com/facility-service/schedules/{}?date={}".format(id, date)
+
+
+class Schedule(object):
+    __slots__ = ("__id", "__date", "__data", "__hours", "__performances")
+
+    def __init__(self, id, date, data):
+        """
+        Constructor Function
+        Parses the schedules document of an entity for one date (yyyy-mm-dd).
+        """
+        self.__id = str(id)
+        self.__date = date
+        self.__data = data
+        self.__hours = self.__parse_hours()
+        self.__performances = None
+
+    def get_id(self):
+        """Returns the id of the entity the schedule belongs to"""
+        return self.__id
+
+    def get_date(self):
+        """Returns the date of the schedule as "yyyy-mm-dd" """
+        return self.__date
+
+    def get_raw_data(self):
+        """Returns a copy of the raw schedules document"""
+        return deepcopy(self.__data)
+
+    def get_entries(self, type = None):
+        """Returns a copy of the list of schedule entries, only the ones of a type (e.g. "Operating", "Performance Time") if given"""
+        return deepcopy(self.__get_entries(type))
+
+    def get_hours(self):
+        """
+        Returns the hours in the following order: operating open, operating close, Extra Magic open, Extra Magic close.
+        Hours that aren't in the schedule are None.
+        """
+        return self.__hours
+
+    def get_performance_times(self, timestamp = False):
+        """
+        Returns a list of dictionaries of the performance times in the form of [{start_time, end_time}]
+        timestamp = False
+        Whether to return datetime objects or timestamps
+        """
+        schedule = []
+        for start_time, end_time in self.__get_performances():
+            if timestamp:
+                schedule.append({'start_time': start_time.timestamp(), 'end_time': end_time.timestamp()})
+            else:
+                schedule.append({'start_time': start_time, 'end_time': end_time})
+
+        return schedule
+
+    def get_performance_timestamps(self):
+        """Returns a tuple (start times, end times) of the performance times as two array('d') of timestamps"""
+        starts = array('d')
+        ends = array('d')
+        for start_time, end_time in self.__get_performances():
+            starts.append(start_time.timestamp())
+            ends.append(end_time.timestamp())
+        return starts, ends
+
+    def __get_entries(self, type = None):
+        """Returns the schedule entries of the shared document, not copied"""
+        entries = self.__data.get('schedules', []) if isinstance(self.__data, dict) else []
+        if type is None:
+            return entries
+        return [entry for entry in entries if entry.get('type') == type]
+
+    def __get_performances(self):
+        """
+        Returns the list of (start, end) datetimes of the 'Performance Time' entries, parsed the first time it is needed.
+        An entry that can't be parsed ends the list.
+        """
+        if self.__performances is None:
+            performances = []
+            try:
+                for entry in self.__get_entries('Performance Time'):
+                    start_time = datetime.strptime("{} {}".format(entry['date'], entry['startTime']), "%Y-%m-%d %H:%M:%S")
+                    end_time = datetime.strptime("{} {}".format(entry['date'], entry['endTime']), "%Y-%m-%d %H:%M:%S")
+                    performances.append((start_time, end_time))
+            except Exception:
+                pass
+            self.__performances = performances
+        return self.__performances
+
+    def __parse_hours(self):
+        """Returns (operating open, operating close, extra open, extra close), the last entry of each type wins"""
+        DATE = datetime.strptime(self.__date, "%Y-%m-%d")
+
+        operating_hours_start = None
+        operating_hours_end = None
+        extra_hours_start = None
+        extra_hours_end = None
+
+        try:
+            for entry in self.__get_entries():
+                if entry['type'] == 'Operating':
+                    operating_hours_start, operating_hours_end = self.__parse_times(DATE, entry)
+                elif entry['type'] == "Special Ticketed Event":
+                    extra_hours_start, extra_hours_end = self.__parse_times(DATE, entry)
+        except KeyError:
+            pass
+
+        return operating_hours_start, operating_hours_end, extra_hours_start, extra_hours_end
+
+    def __parse_times(self, DATE, entry):
+        """Returns the start and end of an entry as datetimes, ends from midnight to 7am are on the next day"""
+        start = DATE.replace(hour=int(entry['startTime'][0:2]), minute=int(entry['startTime'][3:5]))
+        end = DATE.replace(hour=int(entry['endTime'][0:2]), minute=int(entry['endTime'][3:5]))
+        if end.hour <= 7:
+            end += timedelta(days=1)
+        return start, end
+
+    def __str__(self):
+        return 'Schedule object for {} on {}'.format(self.__id, self.__date)
+
+
+def is_schedule(data):
+    """Returns whether a decoded response is a schedules document rather than an error body"""
+    return isinstance(data, dict) and isinstance(data.get('schedules'), list)
+
+def get_schedule(id, date = ""):
+    """
+    Returns the Schedule of id on a date ("yyyy-mm-dd", date or datetime, default today), downloading it only if it isn't cached.
+    Only real schedules documents are cached, an error response gives a Schedule without hours that is downloaded again next time.
+    """
+    date = format_date(date)
+    url = get_url(id, date)
+
+    found, schedule = schedule_cache.get(url)
+    if found:
+        return schedule
+
+    data = get_json(url)
+    schedule = Schedule(id, date, data)
+    if is_schedule(data):
+        schedule_cache.set(url, schedule)
+    return schedule
+
+def get_schedules(id, start, end, max_workers = None):
+    """
+    Returns the list of Schedules of id for every date from start to end (both included), in date order.
+    Dates that aren't cached are downloaded at once using at most max_workers threads (default workers.max_workers).
+    Raises the first error if a date couldn't be downloaded.
+    """
+    dates = get_dates(start, end)
+    schedules, errors = map_concurrent(lambda date: get_schedule(id, date), dates, max_workers)
+    for date in dates:
+        if date in errors:
+            raise errors[date]
+    return schedules
+
+def get_hours_range(id, start, end, max_workers = None):
+    """Returns a dictionary of the hours of id for every date from start to end (both included) in the form of {"yyyy-mm-dd": Schedule.get_hours()}"""
+    return {schedule.get_date(): schedule.get_hours() for schedule in get_schedules(id, start, end, max_workers)}
+
+def get_showtimes(ids, start = "", end = None, max_workers = None):
+    """
+    Returns the ShowTimes of every entertainment id on every date from start to end (both included, default today).
+    Every (id, date) schedule that isn't cached is downloaded at once using at most max_workers threads (default workers.max_workers).
+    Schedules that couldn't be downloaded are in ShowTimes.get_errors() instead of raising.
+    """
+    dates = get_dates(start, start if end is None else end)
+    items = [(str(id), date) for id in ids for date in dates]
+    schedules, errors = map_concurrent(lambda item: get_schedule(*item), items, max_workers)
+
+    show_ids = []
+    starts = array('d')
+    ends = array('d')
+    for schedule in schedules:
+        schedule_starts, schedule_ends = schedule.get_performance_timestamps()
+        show_ids.extend([schedule.get_id()] * len(schedule_starts))
+        starts.extend(schedule_starts)
+        ends.extend(schedule_ends)
+
+    return ShowTimes(show_ids, starts, ends, errors)
+
+
+class ShowTimes(object):
+    __slots__ = ("__ids", "__starts", "__ends", "__errors")
+
+    def __init__(self, ids, starts, ends, errors = None):
+        """
+        Constructor Function
+        Performance times of many entertainments, kept as three parallel columns with one item per performance sorted by start time:
+        the entertainment ids, and the start and end timestamps as array('d').
+        """
+        order = sorted(range(len(starts)), key=starts.__getitem__)
+        self.__ids = [ids[i] for i in order]
+        self.__starts = array('d', [starts[i] for i in order])
+        self.__ends = array('d', [ends[i] for i in order])
+        self.__errors = {} if errors is None else errors
+
+    def get_ids(self):
+        """Returns the list of entertainment ids, one per performance"""
+        return self.__ids
+
+    def get_starts(self):
+        """Returns the start timestamps as an array('d'), numpy.frombuffer turns it into an array without copying"""
+        return self.__starts
+
+    def get_ends(self):
+        """Returns the end timestamps as an array('d')"""
+        return self.__ends
+
+    def get_errors(self):
+        """Returns the schedules that couldn't be downloaded in the form of {(id, date): exception}"""
+        return self.__errors
+
+    def get_times(self, id):
+        """Returns a tuple (start times, end times) of one entertainment as two array('d')"""
+        id = str(id)
+        rows = [i for i, show_id in enumerate(self.__ids) if show_id == id]
+        return array('d', [self.__starts[i] for i in rows]), array('d', [self.__ends[i] for i in rows])
+
+    def get_between(self, start, end):
+        """Returns a ShowTimes of the performances starting at or after start and before end (timestamps)"""
+        first = bisect_left(self.__starts, start)
+        last = bisect_left(self.__starts, end)
+        return ShowTimes(self.__ids[first:last], self.__starts[first:last], self.__ends[first:last], self.__errors)
+
+    def __len__(self):
+        return len(self.__starts)
+
+    def __str__(self):
+        return 'ShowTimes object with {} performances of {} entertainments'.format(len(self), len(set(self.__ids)))
+
+
+def clear():
+    """Forgets every parsed schedule"""
+    schedule_cache.clear()
@@ -0,0 +1,177 @@
+"""
+spatial module
+grid index over entity coordinates for nearest and within radius queries, needs numpy (pip install MouseTools[numpy])
+"""
+import math
+
+# Mean earth radius in meters
+EARTH_RADIUS = 6371008.8
+# Meters in a degree of latitude
+METERS_PER_DEGREE = EARTH_RADIUS * math.pi / 180
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('SpatialIndex needs numpy. Install it with: pip install MouseTools[numpy]')
+    return numpy
+
+def haversine(latitude, longitude, latitudes, longitudes):
+    """Returns the great circle distances in meters from one point to arrays of points, all in degrees"""
+    np = _numpy()
+    lat = np.radians(latitude)
+    lats = np.radians(latitudes)
+    a = np.sin((lats - lat) / 2) ** 2 + math.cos(lat) * np.cos(lats) * np.sin(np.radians(np.subtract(longitudes, longitude)) / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def get_point(coordinates):
+    """Returns (latitude, longitude) as floats from what get_coordinates returns, None if there are no usable coordinates"""
+    try:
+        point = (float(coordinates['latitude']), float(coordinates['longitude']))
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-90 <= point[0] <= 90 and -180 <= point[1] <= 180):
+        return None
+    return point
+
+
+class SpatialIndex(object):
+
+    def __init__(self, entities, cell_size = 250):
+        """
+        Constructor Function
+        entities = objects with get_id() and get_coordinates() (e.g. Catalog.get_entities()) or tuples (id, latitude, longitude).
+        Objects without coordinates are left out.
+        Points are put in a grid of cells about cell_size meters wide, so a query only measures the points of the cells around it.
+        """
+        np = _numpy()
+        ids = []
+        points = []
+        self.__entities = {}
+        for entity in entities:
+            if isinstance(entity, tuple):
+                id, point = str(entity[0]), get_point({'latitude': entity[1], 'longitude': entity[2]})
+            else:
+                id, point = str(entity.get_id()), get_point(entity.get_coordinates())
+                self.__entities[id] = entity
+            if point is not None:
+                ids.append(id)
+                points.append(point)
+
+        self.cell_size = cell_size
+        self.__ids = ids
+        self.__latitudes = np.array([point[0] for point in points], dtype=float)
+        self.__longitudes = np.array([point[1] for point in points], dtype=float)
+
+        # cells are square at the mean latitude of the points
+        mean_latitude = float(self.__latitudes.mean()) if len(points) else 0.0
+        self.__cell_latitude = cell_size / METERS_PER_DEGREE
+        self.__cell_longitude = cell_size / (METERS_PER_DEGREE * max(math.cos(math.radians(mean_latitude)), 1e-6))
+
+        rows = np.floor(self.__latitudes / self.__cell_latitude).astype(np.int64)
+        columns = np.floor(self.__longitudes / self.__cell_longitude).astype(np.int64)
+        cells = {}
+        for i, cell in enumerate(zip(rows.tolist(), columns.tolist())):
+            cells.setdefault(cell, []).append(i)
+        self.__cells = {cell: np.array(members, dtype=np.int64) for cell, members in cells.items()}
+        self.__bounds = (int(rows.min()), int(rows.max()), int(columns.min()), int(columns.max())) if len(points) else (0, 0, 0, 0)
+
+    def get_ids(self):
+        """Returns the ids of the indexed points"""
+        return list(self.__ids)
+
+    def get_entity(self, id):
+        """Returns the object an id was indexed from, None if it was indexed from a tuple"""
+        return self.__entities.get(str(id))
+
+    def get_distances(self, latitude, longitude):
+        """Returns the distances in meters from a point to every indexed point, in the order of get_ids()"""
+        return haversine(latitude, longitude, self.__latitudes, self.__longitudes)
+
+    def within(self, latitude, longitude, radius):
+        """Returns a list of tuples (id, meters) of the points within radius meters of a point, nearest first"""
+        np = _numpy()
+        candidates = self.__candidates(latitude, longitude, radius)
+        distances = haversine(latitude, longitude, self.__latitudes[candidates], self.__longitudes[candidates])
+        inside = distances <= radius
+        candidates = candidates[inside]
+        distances = distances[inside]
+        order = np.argsort(distances, kind="stable")
+        return [(self.__ids[i], float(d)) for i, d in zip(candidates[order].tolist(), distances[order].tolist())]
+
+    def nearest(self, latitude, longitude, k = 1):
+        """Returns a list of tuples (id, meters) of the k points nearest to a point, nearest first"""
+        np = _numpy()
+        k = min(k, len(self.__ids))
+        if k <= 0:
+            return []
+
+        # widen a square of cells around the point until it holds k points. The kth nearest of those bounds the true kth
+        # distance from above, so the exact answer is among the points within that distance.
+        # The square starts at the nearest occupied cells and doubles, and once it is larger than the occupied cells every point is measured
+        row = math.floor(latitude / self.__cell_latitude)
+        column = math.floor(longitude / self.__cell_longitude)
+        first_row, last_row, first_column, last_column = self.__bounds
+        ring = max(first_row - row, row - last_row, first_column - column, column - last_column, 0)
+        candidates = None
+        while (2 * ring + 1) ** 2 <= len(self.__cells):
+            candidates = self.__cells_between(row - ring, row + ring, column - ring, column + ring)
+            if len(candidates) >= k:
+                break
+            ring = max(2 * ring, ring + 1)
+        if candidates is None or len(candidates) < k:
+            candidates = np.arange(len(self.__ids))
+
+        distances = haversine(latitude, longitude, self.__latitudes[candidates], self.__longitudes[candidates])
+        if len(candidates) == len(self.__ids):
+            nearest = np.argpartition(distances, k - 1)[:k]
+            order = nearest[np.argsort(distances[nearest], kind="stable")]
+            return [(self.__ids[i], float(d)) for i, d in zip(candidates[order].tolist(), distances[order].tolist())]
+        bound = float(np.partition(distances, k - 1)[k - 1])
+        return self.within(latitude, longitude, bound)[:k]
+
+    def __candidates(self, latitude, longitude, radius):
+        """Returns the indices of the points in the cells that cover radius meters around a point"""
+        np = _numpy()
+        delta_latitude = radius / METERS_PER_DEGREE
+        cos = math.cos(math.radians(latitude))
+        if abs(latitude) + delta_latitude >= 90 or cos < 1e-6:
+            return np.arange(len(self.__ids))
+        delta_longitude = min(radius / (METERS_PER_DEGREE * math.cos(math.radians(min(abs(latitude) + delta_latitude, 89.999)))), 180)
+
+        first_row = math.floor((latitude - delta_latitude) / self.__cell_latitude)
+        last_row = math.floor((latitude + delta_latitude) / self.__cell_latitude)
+        first_column = math.floor((longitude - delta_longitude) / self.__cell_longitude)
+        last_column = math.floor((longitude + delta_longitude) / self.__cell_longitude)
+        return self.__cells_between(first_row, last_row, first_column, last_column)
+
+    def __cells_between(self, first_row, last_row, first_column, last_column):
+        """Returns the indices of the points in a rectangle of cells"""
+        np = _numpy()
+        bounds = self.__bounds
+        first_row, last_row = max(first_row, bounds[0]), min(last_row, bounds[1])
+        first_column, last_column = max(first_column, bounds[2]), min(last_column, bounds[3])
+        if first_row > last_row or first_column > last_column:
+            return np.array([], dtype=np.int64)
+        if (first_row, last_row, first_column, last_column) == bounds:
+            return np.arange(len(self.__ids))
+
+        members = []
+        if (last_row - first_row + 1) * (last_column - first_column + 1) > len(self.__cells):
+            for (row, column), cell in self.__cells.items():
+                if first_row <= row <= last_row and first_column <= column <= last_column:
+                    members.append(cell)
+        else:
+            for row in range(first_row, last_row + 1):
+                for column in range(first_column, last_column + 1):
+                    cell = self.__cells.get((row, column))
+                    if cell is not None:
+                        members.append(cell)
+        return np.concatenate(members) if members else np.array([], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.__ids)
+
+    def __str__(self):
+        return 'SpatialIndex object with {} points in {} cells'.format(len(self.__ids), len(self.__cells))
@@ -0,0 +1,264 @@
+"""
+store module
+persistent sqlite store for facility documents, schedules and calendar data
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from . import client
+from .workers import map_concurrent
+
+DOCUMENT_URL = re.compile(r"facility-service/([\w-]+)/([^/?]+)$")
+SCHEDULE_URL = re.compile(r"facility-service/schedules/([^/?]+)\?date=(\d{4}-\d{2}-\d{2})$")
+
+# destination link name: facility-service path used by the entity constructors
+CATALOG_TYPES = {
+    "themeParks": "theme-parks",
+    "waterParks": "water-parks",
+    "attractions": "attractions",
+    "entertainments": "entertainments",
+    "entertainmentVenues": "entertainment-venues",
+}
+
+_active = None
+_private = None
+_lock = threading.Lock()
+
+
+def enable(path = None):
+    """
+    Opens the store at path (default CACHE_DIR/mousetools.db) and makes every request the library makes read from and write to it.
+    Returns the Store object
+    """
+    global _active
+
+    if path is None:
+        path = get_default_path()
+
+    with _lock:
+        if _active is not None:
+            _active.close()
+        _active = Store(path)
+        return _active
+
+def disable():
+    """Closes the active store, requests go straight to the network again"""
+    global _active
+
+    with _lock:
+        if _active is not None:
+            _active.close()
+        _active = None
+
+def get_active():
+    """Returns the active Store or None"""
+    return _active
+
+def get_store():
+    """
+    Returns the active Store. If none was enabled, returns a private Store at the default path instead, which only
+    the callers of get_store use: other requests don't read from or write to it
+    """
+    global _private
+
+    with _lock:
+        if _active is not None:
+            return _active
+        if _private is None:
+            _private = Store(get_default_path())
+        return _private
+
+def get_default_path():
+    """Returns CACHE_DIR/mousetools.db"""
+    from .ids import CACHE_DIR
+    if CACHE_DIR is None:
+        raise ValueError('No path given and ids.CACHE_DIR is None')
+    return os.path.join(CACHE_DIR, "mousetools.db")
+
+
+class Store(object):
+
+    def __init__(self, path, document_ttl = 7*24*60*60, schedule_ttl = 24*60*60):
+        """
+        Constructor Function
+        Opens (and creates if needed) the sqlite database at path.
+        Documents older than document_ttl seconds and schedules older than schedule_ttl seconds are treated as missing.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.document_ttl = document_ttl
+        self.schedule_ttl = schedule_ttl
+        self.__lock = threading.Lock()
+        self.__conn = sqlite3.connect(path, check_same_thread=False)
+        with self.__lock:
+            self.__conn.execute("PRAGMA journal_mode=WAL")
+            self.__conn.execute("CREATE TABLE IF NOT EXISTS documents (url TEXT PRIMARY KEY, kind TEXT, id TEXT, destination_id TEXT, body TEXT, fetched REAL)")
+            self.__conn.execute("CREATE INDEX IF NOT EXISTS documents_destination ON documents (destination_id, kind)")
+            self.__conn.execute("CREATE TABLE IF NOT EXISTS schedules (id TEXT, date TEXT, body TEXT, fetched REAL, PRIMARY KEY (id, date))")
+            self.__conn.execute("CREATE TABLE IF NOT EXISTS calendar (destination_id TEXT, date TEXT, body TEXT, fetched REAL, PRIMARY KEY (destination_id, date))")
+            self.__conn.commit()
+
+    def close(self):
+        """Closes the database connection"""
+        with self.__lock:
+            self.__conn.close()
+
+    def get(self, url):
+        """Returns a tuple (found, data) for a facility document or schedule url, found is False if it is missing or stale"""
+        match = SCHEDULE_URL.search(url)
+        if match:
+            row = self.__fetchone("SELECT body, fetched FROM schedules WHERE id = ? AND date = ?", match.groups())
+            ttl = self.schedule_ttl
+        elif DOCUMENT_URL.search(url):
+            row = self.__fetchone("SELECT body, fetched FROM documents WHERE url = ?", (url,))
+            ttl = self.document_ttl
+        else:
+            return False, None
+
+        if row is None or time.time() - row[1] >= ttl:
+            return False, None
+        return True, json.loads(row[0])
+
+    def set(self, url, data):
+        """Stores a facility document or schedule. Other urls are ignored"""
+        match = SCHEDULE_URL.search(url)
+        if match:
+            self.__execute("INSERT OR REPLACE INTO schedules VALUES (?, ?, ?, ?)", (match.group(1), match.group(2), json.dumps(data), time.time()))
+            return
+
+        match = DOCUMENT_URL.search(url)
+        if match:
+            kind, id = match.groups()
+            try:
+                destination_id = data['ancestorDestination']['id'].split(';')[0]
+            except (KeyError, TypeError, AttributeError):
+                destination_id = id if kind == "destinations" else None
+            self.__execute("INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?)", (url, kind, id.split(';')[0], destination_id, json.dumps(data), time.time()))
+
+    def get_document_ids(self, destination_id, kind = None):
+        """Returns the ids of the documents stored for a destination, optionally only of one kind (e.g. "attractions")"""
+        if kind is None:
+            rows = self.__fetchall("SELECT id FROM documents WHERE destination_id = ? AND kind IN ({})".format(",".join("?"*len(CATALOG_TYPES))), (destination_id,) + tuple(CATALOG_TYPES.values()))
+        else:
+            rows = self.__fetchall("SELECT id FROM documents WHERE destination_id = ? AND kind = ?", (destination_id, kind))
+        return [row[0] for row in rows]
+
+    def sync_destination(self, destination_id, max_age = None, max_workers = None):
+        """
+        Brings the stored parks, attractions, entertainments and venues of a destination up to date.
+        Only the destination's id lists are downloaded in full. Documents are fetched when they are new or older than max_age
+        seconds (default document_ttl), and documents no longer listed by Disney are removed.
+        Returns a dictionary in the form of {added, refreshed, removed, unchanged, errors}
+        """
+        if max_age is None:
+            max_age = self.document_ttl
+
+        dest_data = client.get_json("https://api.wdpro.disney.go.com/facility-service/destinations/{}".format(destination_id), use_cache=False)
+        self.set("https://api.wdpro.disney.go.com/facility-service/destinations/{}".format(destination_id), dest_data)
+
+        summary = {'added': [], 'refreshed': [], 'removed': [], 'unchanged': [], 'errors': {}}
+        for link, kind in CATALOG_TYPES.items():
+            try:
+                data = client.get_json(dest_data['links'][link]['href'], use_cache=False)
+                listed = [entry['links']['self']['href'].split('/')[-1].split('?')[0] for entry in data['entries'] if 'links' in entry]
+            except (KeyError, TypeError, ValueError):
+                continue
+
+            stored = dict(self.__fetchall("SELECT id, fetched FROM documents WHERE destination_id = ? AND kind = ?", (destination_id, kind)))
+            now = time.time()
+            stale = [id for id in listed if id not in stored or now - stored[id] >= max_age]
+            summary['unchanged'].extend(id for id in listed if id in stored and now - stored[id] < max_age)
+
+            listed = set(listed)
+            removed = [id for id in stored if id not in listed]
+            for id in removed:
+                self.__execute("DELETE FROM documents WHERE destination_id = ? AND kind = ? AND id = ?", (destination_id, kind, id))
+            summary['removed'].extend(removed)
+
+            def fetch(id):
+                url = "https://api.wdpro.disney.go.com/global-pool-override-B/facility-service/{}/{}".format(kind, id)
+                response = client.get(url)
+                data = response.json()
+                if not response.ok:
+                    raise ValueError('That {} is not available. id: {}'.format(kind, id))
+                client.response_cache.set(url, data)
+                self.set(url, data)
+                return id
+
+            fetched, errors = map_concurrent(fetch, stale, max_workers)
+            summary['added'].extend(id for id in fetched if id not in stored)
+            summary['refreshed'].extend(id for id in fetched if id in stored)
+            summary['errors'].update(errors)
+
+        return summary
+
+    def sync_calendar(self, destination_id, date, max_workers = None):
+        """
+        Builds the calendar of a destination for a date (yyyy-mm-dd) from the schedules of every stored entity of that destination.
+        Only schedules missing from the store are downloaded. If nothing is stored for the destination yet, it is synced first.
+        Returns the calendar, see get_calendar
+        """
+        from .schedules import is_schedule
+
+        ids = self.get_document_ids(destination_id)
+        if len(ids) == 0:
+            self.sync_destination(destination_id, max_workers=max_workers)
+            ids = self.get_document_ids(destination_id)
+
+        def fetch(id):
+            url = "https://api.wdpro.disney.go.com/facility-service/schedules/{}?date={}".format(id, date)
+            found, data = self.get(url)
+            if not found:
+                data = client.get_json(url)
+                if is_schedule(data):
+                    self.set(url, data)
+            return id, data
+
+        schedules, errors = map_concurrent(fetch, ids, max_workers)
+        types = dict(self.__fetchall("SELECT id, json_extract(body, '$.type') FROM documents WHERE destination_id = ?", (destination_id,)))
+
+        calendar = {'date': date, 'schedules': {}, 'refurbishments': [], 'closed': []}
+        for id, data in schedules:
+            entries = [entry for entry in data.get('schedules', []) if entry.get('date', date) == date]
+            calendar['schedules'][id] = entries
+            for entry in entries:
+                if entry.get('type') == 'Refurbishment':
+                    calendar['refurbishments'].append((id, types.get(id)))
+                elif entry.get('type') == 'Closed':
+                    calendar['closed'].append((id, types.get(id)))
+
+        self.__execute("INSERT OR REPLACE INTO calendar VALUES (?, ?, ?, ?)", (destination_id, date, json.dumps(calendar), time.time()))
+        return calendar
+
+    def get_calendar(self, destination_id, date):
+        """
+        Returns the stored calendar of a destination for a date in the form of {date, schedules: {id: [entries]}, refurbishments: [(id, entityType)], closed: [(id, entityType)]}
+        Returns None if it has not been synced or was synced more than schedule_ttl seconds ago
+        """
+        row = self.__fetchone("SELECT body, fetched FROM calendar WHERE destination_id = ? AND date = ?", (destination_id, date))
+        if row is None or time.time() - row[1] >= self.schedule_ttl:
+            return None
+
+        calendar = json.loads(row[0])
+        calendar['refurbishments'] = [tuple(i) for i in calendar['refurbishments']]
+        calendar['closed'] = [tuple(i) for i in calendar['closed']]
+        return calendar
+
+    def __execute(self, sql, params):
+        with self.__lock:
+            self.__conn.execute(sql, params)
+            self.__conn.commit()
+
+    def __fetchone(self, sql, params):
+        with self.__lock:
+            return self.__conn.execute(sql, params).fetchone()
+
+    def __fetchall(self, sql, params):
+        with self.__lock:
+            return self.__conn.execute(sql, params).fetchall()
@@ -0,0 +1,134 @@
+"""
+transport module
+what actually answers the library's requests: the network, or a cassette recorded from it
+"""
+import gzip
+import json
+import time
+import random
+import threading
+from . import client
+
+
+class Response(object):
+
+    def __init__(self, url, status_code, content):
+        """
+        Constructor Function
+        A recorded response, it has the parts of requests.Response the library uses.
+        """
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class Transport(object):
+    """
+    Base class of transports. A transport gets a url with headers and returns a response with status_code, ok, content and json().
+    Transports can be used as context managers to make them the client's transport for the duration of a block.
+    """
+
+    def get(self, url, headers = None, timeout = None):
+        raise NotImplementedError
+
+    def __enter__(self):
+        self.__previous = client.set_transport(self)
+        return self
+
+    def __exit__(self, *exc):
+        client.set_transport(self.__previous)
+        return False
+
+
+class RequestsTransport(Transport):
+
+    def get(self, url, headers = None, timeout = None):
+        """Sends the request through the client's pooled session"""
+        return client.get_session().get(url, headers=headers, timeout=timeout)
+
+
+class RecordingTransport(Transport):
+
+    def __init__(self, path, transport = None):
+        """
+        Constructor Function
+        Sends requests through transport (default RequestsTransport) and records every response to a cassette at path.
+        The cassette is written by save(), or when leaving the with block.
+        """
+        self.path = path
+        self.__transport = transport if transport is not None else RequestsTransport()
+        self.__responses = {}
+        self.__lock = threading.Lock()
+
+    def get(self, url, headers = None, timeout = None):
+        response = self.__transport.get(url, headers=headers, timeout=timeout)
+        with self.__lock:
+            self.__responses.setdefault(url, []).append([response.status_code, response.content.decode("utf-8")])
+        return response
+
+    def save(self):
+        """Writes the recorded responses to the cassette as gzipped json"""
+        with self.__lock:
+            cassette = {"version": 1, "responses": self.__responses}
+            with gzip.open(self.path, "wt", encoding="utf-8") as f:
+                json.dump(cassette, f, separators=(",", ":"))
+
+    def __exit__(self, *exc):
+        self.save()
+        return super().__exit__(*exc)
+
+
+class ReplayTransport(Transport):
+
+    def __init__(self, path, latency = 0, strict = True):
+        """
+        Constructor Function
+        Answers requests from a cassette written by RecordingTransport without touching the network.
+        A url recorded several times is answered with its responses in the order they were recorded, then the last one again.
+        latency = seconds to wait before each response, or (min, max) for a random wait in that range.
+        If strict is True, a url missing from the cassette raises LookupError, otherwise it gets a 404.
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            cassette = json.load(f)
+
+        self.path = path
+        self.latency = latency
+        self.strict = strict
+        self.__responses = cassette["responses"]
+        self.__served = {}
+        self.__lock = threading.Lock()
+
+    def get(self, url, headers = None, timeout = None):
+        if isinstance(self.latency, (tuple, list)):
+            time.sleep(random.uniform(*self.latency))
+        elif self.latency:
+            time.sleep(self.latency)
+
+        recorded = self.__responses.get(url)
+        if recorded is None:
+            if self.strict:
+                raise LookupError('That url is not in the cassette. url: {}'.format(url))
+            return Response(url, 404, b'{"errors": [{"message": "not recorded"}]}')
+
+        with self.__lock:
+            served = self.__served.get(url, 0)
+            self.__served[url] = served + 1
+
+        status_code, body = recorded[min(served, len(recorded) - 1)]
+        return Response(url, status_code, body.encode("utf-8"))
+
+    def rewind(self):
+        """Starts serving every url from its first recorded response again"""
+        with self.__lock:
+            self.__served.clear()
@@ -0,0 +1,389 @@
+"""
+waittimes module
+themeparks api wait times, downloaded and parsed once per park and shared by every park, destination and entity
+"""
+import time
+import asyncio
+import threading
+import warnings
+import importlib
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+import pytz
+from .client import get_json
+from .ids import themeparkapi_ids
+
+# Seconds a park's snapshot is reused before it is downloaded again
+default_max_age = 60
+# Seconds a themeparks api download may wait on the server before it fails, so a hung feed doesn't hold a worker forever
+feed_timeout = 15
+
+_snapshots = {}
+_park_locks = {}
+_lock = threading.Lock()
+# Downloads that miss a deadline keep running here and still refresh the shared snapshot when they finish
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="mousetools-waittimes")
+
+
+def _import_optional(name, extra):
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise ImportError('This needs {}. Install it with: pip install MouseTools[{}]'.format(name, extra))
+
+@lru_cache(maxsize=4096)
+def parse_last_update(value):
+    """
+    Returns a themeparks api lastUpdate string as a utc datetime, None if it can't be parsed.
+    Most entries keep the same lastUpdate from one download to the next, so each string is only parsed once.
+    """
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=pytz.utc)
+    except (TypeError, ValueError):
+        return None
+
+
+class WaitTimeSnapshot(object):
+
+    def __init__(self, data, park = None):
+        """
+        Constructor Function
+        Parses the list of dictionaries the themeparks api returns for a park once, every view is computed from the parsed entries.
+        """
+        self.__park = park
+        self.__data = data
+        self.__fetched = time.monotonic()
+        self.__entries = []
+        self.__index = {}
+        self.__statuses = {}
+
+        for i in data:
+            id = i['id'].split("_")[-1]
+            try:
+                type = i['meta']['type']
+            except (KeyError, TypeError):
+                type = None
+
+            last_update = i.get('lastUpdate')
+            self.__entries.append((id, i['name'], i['status'], i['waitTime'], parse_last_update(last_update), type, last_update))
+            self.__index[id] = i
+
+    @classmethod
+    def combine(cls, snapshots, statuses = None):
+        """
+        Returns one snapshot holding the entries of all the given snapshots, without parsing them again.
+        statuses = {park: status} describes which parks made it into the snapshot, see get_statuses
+        """
+        snapshot = cls([])
+        for other in snapshots:
+            snapshot.__data = snapshot.__data + other.__data
+            snapshot.__entries.extend(other.__entries)
+            snapshot.__index.update(other.__index)
+            snapshot.__fetched = min(snapshot.__fetched, other.__fetched)
+        snapshot.__statuses = dict(statuses or {})
+        return snapshot
+
+    def get_statuses(self):
+        """
+        Returns a dictionary in the form of {park: status} for a combined snapshot.
+        status is "ok", "timeout" (not downloaded before the deadline), "error" or "unavailable" (the themeparks api has no feed for the park)
+        """
+        return dict(self.__statuses)
+
+    def is_complete(self):
+        """Returns whether every park of a combined snapshot that has a themeparks api feed made it in"""
+        return all(status in ("ok", "unavailable") for status in self.__statuses.values())
+
+    def get_park(self):
+        """Returns the themeparks api park name of the snapshot, None if it was combined from several parks"""
+        return self.__park
+
+    def get_age(self):
+        """Returns how many seconds ago the snapshot was downloaded"""
+        return time.monotonic() - self.__fetched
+
+    def get_raw_data(self):
+        """Returns the list of dictionaries from the themeparks api"""
+        return self.__data
+
+    def get_raw_entry(self, id):
+        """Returns the dictionary from the themeparks api for an entity id, None if the park doesn't list it"""
+        return self.__index.get(str(id))
+
+    def get_wait_times(self):
+        """Returns a dictionary in the form of {rideid:time} for attractions and entertainments"""
+        return {id: wait_time for id, name, status, wait_time, last_updated, type, last_update in self.__entries if type != "RESTAURANT"}
+
+    def get_wait_times_detailed(self, time_zone = pytz.utc):
+        """Returns a dictionary in the form of {rideid:{name, status, wait_time, last_updated, entityType}} for attractions and entertainments"""
+        return self.__detailed(lambda type: type != "RESTAURANT", time_zone)
+
+    def get_attraction_wait_times(self):
+        """Returns a dictionary in the form of {rideid:time} for attractions"""
+        return {id: wait_time for id, name, status, wait_time, last_updated, type, last_update in self.__entries if type == "ATTRACTION"}
+
+    def get_attraction_wait_times_detailed(self, time_zone = pytz.utc):
+        """Returns a dictionary in the form of {rideid:{name, status, wait_time, last_updated, entityType}} for attractions"""
+        return self.__detailed(lambda type: type == "ATTRACTION", time_zone)
+
+    def get_entertainment_wait_times(self):
+        """Returns a dictionary in the form of {rideid:time} for entertainments"""
+        return {id: wait_time for id, name, status, wait_time, last_updated, type, last_update in self.__entries if type is None}
+
+    def get_entertainment_wait_times_detailed(self, time_zone = pytz.utc):
+        """Returns a dictionary in the form of {rideid:{name, status, wait_time, last_updated, entityType}} for entertainments"""
+        return self.__detailed(lambda type: type is None, time_zone)
+
+    def get_columns(self, entity_type = None):
+        """
+        Returns the attractions and entertainments as columns, a dictionary of NumPy arrays {id, name, status, wait_time, last_updated, entityType},
+        built straight from the themeparks api data without a dictionary or datetime per ride.
+        wait_time is a float, NaN when there is none, and last_updated is a utc datetime64[ms], NaT when there is none.
+        entity_type = "Attraction" or "Entertainment" to only get those. Needs numpy
+        """
+        np = _import_optional("numpy", "numpy")
+
+        entries = [entry for entry in self.__entries if entry[5] != "RESTAURANT"]
+        if entity_type is not None:
+            entries = [entry for entry in entries if (entry[5].capitalize() if entry[5] is not None else "Entertainment") == entity_type]
+        ids, names, statuses, wait_times, parsed, types, stamps = list(zip(*entries)) or [()] * 7
+
+        # lastUpdate repeats a lot, so only the distinct strings are parsed
+        distinct = {}
+        positions = [distinct.setdefault(stamp, len(distinct)) for stamp in stamps]
+        with warnings.catch_warnings():
+            # numpy converts a "+00:00" style offset to utc but warns about it
+            warnings.simplefilter("ignore", UserWarning)
+            try:
+                values = np.array([(s[:-1] if s.endswith("Z") else s) if isinstance(s, str) else "NaT" for s in distinct], dtype="datetime64[ms]")
+            except ValueError:
+                # not a format numpy reads, fall back to parse_last_update
+                values = np.array([np.datetime64(parse_last_update(s).replace(tzinfo=None), "ms") if parse_last_update(s) is not None else np.datetime64("NaT") for s in distinct], dtype="datetime64[ms]")
+
+        return {
+            'id': np.array(ids, dtype=str),
+            'name': np.array(names, dtype=str),
+            'status': np.array([status or "" for status in statuses], dtype=str),
+            'wait_time': np.array(wait_times, dtype=float),
+            'last_updated': values[positions] if len(positions) else np.array([], dtype="datetime64[ms]"),
+            'entityType': np.array([type.capitalize() if type is not None else "Entertainment" for type in types], dtype=str),
+        }
+
+    def to_numpy(self, entity_type = None):
+        """Returns the columns of get_columns as one NumPy structured array with a record per ride"""
+        np = _import_optional("numpy", "numpy")
+        columns = self.get_columns(entity_type)
+        return np.rec.fromarrays(list(columns.values()), names=list(columns))
+
+    def to_pandas(self, entity_type = None):
+        """Returns the columns of get_columns as a pandas DataFrame, with last_updated in utc. Needs pandas"""
+        pandas = _import_optional("pandas", "pandas")
+        frame = pandas.DataFrame(self.get_columns(entity_type))
+        frame['last_updated'] = frame['last_updated'].dt.tz_localize("UTC")
+        return frame
+
+    def to_arrow(self, entity_type = None):
+        """Returns the columns of get_columns as a pyarrow Table, with last_updated in utc. Needs pyarrow"""
+        pyarrow = _import_optional("pyarrow", "arrow")
+        columns = self.get_columns(entity_type)
+        arrays = [pyarrow.array(column, type=pyarrow.timestamp("ms", tz="UTC")) if name == 'last_updated' else pyarrow.array(column) for name, column in columns.items()]
+        return pyarrow.table(arrays, names=list(columns))
+
+    def __detailed(self, include, time_zone):
+        times = {}
+        for id, name, status, wait_time, last_updated, type, last_update in self.__entries:
+            if include(type):
+                this = {}
+                this['name'] = name
+                this['status'] = status
+                this['wait_time'] = wait_time
+                this['last_updated'] = last_updated.astimezone(time_zone) if last_updated is not None else None
+                this['entityType'] = type.capitalize() if type is not None else "Entertainment"
+                times[id] = this
+
+        return times
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __str__(self):
+        return 'WaitTimeSnapshot object for {}'.format(self.__park)
+
+
+class WaitTimeStream(object):
+
+    def __init__(self, park_ids, interval = 60, time_zone = pytz.utc, timeout = None):
+        """
+        Constructor Function
+        Polls the wait times of the given Disney park ids every interval seconds and only reports the entries that changed.
+        Parks the themeparks api has no feed for are ignored. Each poll waits at most timeout seconds for the parks, see get_snapshots.
+        Iterate over it, with for or async for, to get the changes of every poll that found some.
+        """
+        self.interval = interval
+        self.time_zone = time_zone
+        self.timeout = timeout
+        self.__parks = {themeparkapi_ids[str(id)]: str(id) for id in park_ids if str(id) in themeparkapi_ids}
+        self.__snapshots = {}
+        # park: {themeparks api id: (lastUpdate, waitTime, status, type)}
+        self.__states = {park: {} for park in self.__parks}
+
+    def poll(self):
+        """
+        Checks every park once and returns the entries that changed since the last poll in the form of
+        {rideid:{park, name, status, wait_time, last_updated, entityType}} for attractions and entertainments, or {rideid: None}
+        for the ones no longer listed. The first poll returns every entry.
+        An entry whose lastUpdate is the same as last time is skipped without looking at the rest of it, and a park whose
+        shared snapshot hasn't been downloaded again since the last poll isn't looked at at all.
+        """
+        snapshots, statuses = get_snapshots(self.__parks, self.interval, self.timeout)
+
+        changes = {}
+        for park, snapshot in snapshots.items():
+            if snapshot is self.__snapshots.get(park):
+                continue
+            self.__snapshots[park] = snapshot
+
+            state = self.__states[park]
+            data = snapshot.get_raw_data()
+            for i in data:
+                key = i['id']
+                last_update = i.get('lastUpdate')
+                previous = state.get(key)
+                if previous is not None and previous[0] == last_update:
+                    if last_update is not None or previous[1:3] == (i['waitTime'], i['status']):
+                        continue
+
+                meta = i.get('meta')
+                type = meta.get('type') if isinstance(meta, dict) else None
+                state[key] = (last_update, i['waitTime'], i['status'], type)
+                if type != "RESTAURANT":
+                    changes[key.split("_")[-1]] = self.__entry(park, i, type)
+
+            if len(state) > len(data):
+                listed = {i['id'] for i in data}
+                for key in [key for key in state if key not in listed]:
+                    if state.pop(key)[3] != "RESTAURANT":
+                        changes[key.split("_")[-1]] = None
+
+        return changes
+
+    def __entry(self, park, i, type):
+        last_updated = parse_last_update(i.get('lastUpdate'))
+
+        this = {}
+        this['park'] = self.__parks[park]
+        this['name'] = i['name']
+        this['status'] = i['status']
+        this['wait_time'] = i['waitTime']
+        this['last_updated'] = last_updated.astimezone(self.time_zone) if last_updated is not None else None
+        this['entityType'] = type.capitalize() if type is not None else "Entertainment"
+        return this
+
+    def __iter__(self):
+        next_poll = time.monotonic()
+        while True:
+            changes = self.poll()
+            if changes:
+                yield changes
+            next_poll += self.interval
+            time.sleep(max(0, next_poll - time.monotonic()))
+
+    def __aiter__(self):
+        return self.__async_iter()
+
+    async def __async_iter(self):
+        from .aio import run
+
+        next_poll = time.monotonic()
+        while True:
+            changes = await run(self.poll)
+            if changes:
+                yield changes
+            next_poll += self.interval
+            await asyncio.sleep(max(0, next_poll - time.monotonic()))
+
+    def __str__(self):
+        return 'WaitTimeStream object for {}'.format(", ".join(self.__parks))
+
+
+def fetch_snapshot(park):
+    """
+    Downloads and parses a new snapshot for a themeparks api park name, e.g. "WaltDisneyWorldMagicKingdom"
+    Raises requests' Timeout if the feed doesn't answer within feed_timeout seconds
+    """
+    data = get_json("https://api.themeparks.wiki/preview/parks/{}/waittime".format(park), authenticated=False, use_cache=False, timeout=feed_timeout)
+    return WaitTimeSnapshot(data, park)
+
+def get_snapshot(park, max_age = None):
+    """
+    Returns the shared snapshot for a themeparks api park name, downloading a new one if it is older than max_age seconds (default default_max_age).
+    If many threads need a new snapshot of the same park at once, only one of them downloads it.
+    """
+    if max_age is None:
+        max_age = default_max_age
+
+    snapshot = _snapshots.get(park)
+    if snapshot is not None and snapshot.get_age() < max_age:
+        return snapshot
+
+    with _lock:
+        park_lock = _park_locks.setdefault(park, threading.Lock())
+
+    with park_lock:
+        snapshot = _snapshots.get(park)
+        if snapshot is None or snapshot.get_age() >= max_age:
+            snapshot = fetch_snapshot(park)
+            _snapshots[park] = snapshot
+
+    return snapshot
+
+def get_snapshots(parks, max_age = None, timeout = None):
+    """
+    Gets the shared snapshots of many themeparks api parks concurrently, waiting at most timeout seconds in total (None waits for all).
+    Returns a tuple (snapshots, statuses): {park: WaitTimeSnapshot} for the parks that arrived in time and {park: "ok" | "timeout" | "error"}
+    """
+    futures = {park: _executor.submit(get_snapshot, park, max_age) for park in parks}
+    wait(futures.values(), timeout=timeout)
+
+    snapshots = {}
+    statuses = {}
+    for park, future in futures.items():
+        if not future.done():
+            statuses[park] = "timeout"
+        elif future.exception() is not None:
+            statuses[park] = "error"
+        else:
+            snapshots[park] = future.result()
+            statuses[park] = "ok"
+
+    return snapshots, statuses
+
+def find_entry(id, max_age = None):
+    """
+    Returns a tuple (park, dictionary) of the themeparks api park name and entry of an entity id without knowing its park, (None, None) if no park lists it.
+    Snapshots already downloaded are searched first, the rest of the parks are only downloaded (concurrently) if the id isn't in them.
+    """
+    if max_age is None:
+        max_age = default_max_age
+
+    id = str(id)
+    parks = list(dict.fromkeys(themeparkapi_ids.values()))
+    for park in parks:
+        snapshot = _snapshots.get(park)
+        if snapshot is not None and snapshot.get_age() < max_age and snapshot.get_raw_entry(id) is not None:
+            return park, snapshot.get_raw_entry(id)
+
+    snapshots, statuses = get_snapshots(parks, max_age)
+    for park in parks:
+        if park in snapshots and snapshots[park].get_raw_entry(id) is not None:
+            return park, snapshots[park].get_raw_entry(id)
+    return None, None
+
+def find_raw_entry(id, max_age = None):
+    """Returns the dictionary from the themeparks api for an entity id without knowing its park, None if no park lists it, see find_entry"""
+    return find_entry(id, max_age)[1]
+
+def clear():
+    """Forgets every shared snapshot"""
+    _snapshots.clear()
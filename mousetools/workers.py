@@ -0,0 +1,35 @@
+"""
+workers module
+bounded thread pool used to make many requests at once
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads used by a single bulk call, keep it in line with client pool sizes
+max_workers = 16
+
+
+def map_concurrent(func, items, max_workers = None):
+    """
+    Calls func on every item using at most max_workers threads.
+    Returns a tuple (results, errors): results of the calls that succeeded, in the same order as items,
+    and the calls that raised in the form of {item: exception}
+    """
+    items = list(items)
+    if max_workers is None:
+        max_workers = globals()['max_workers']
+
+    results = []
+    errors = {}
+    if len(items) == 0:
+        return results, errors
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix="mousetools") as executor:
+        futures = [executor.submit(func, item) for item in items]
+
+        for item, future in zip(items, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                errors[item] = e
+
+    return results, errors
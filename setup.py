@@ -11,11 +11,16 @@ setuptools.setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/scaratozzolo/MouseTools",
-    packages=setuptools.find_packages(),
+    packages=setuptools.find_packages(exclude=["benchmarks", "benchmarks.*"]),
     install_requires=[
             "requests",
             "pytz",
         ],
+    extras_require={
+            "numpy": ["numpy"],
+            "pandas": ["numpy", "pandas"],
+            "arrow": ["numpy", "pyarrow"],
+        },
     classifiers=(
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",